@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""
+Compare the installed JSON backends on LinkedIn-shaped payloads. A backend
+is only listed as correct when it decodes every payload to the same value
+as the stdlib json module.
+
+    python benchmarks/bench_decode.py [iterations]
+"""
+import json
+import sys
+import timeit
+
+from linkedin_json_client import payloads
+from linkedin_json_client.decoders import available_backends, get_decoder
+
+PAYLOADS = [
+    ('profile', json.dumps(payloads.person(0, full=True))),
+    ('connections 500 basic', json.dumps(payloads.connections_page())),
+    ('connections 500 full', json.dumps(
+        payloads.connections_page(full=True))),
+    ('network updates 250', json.dumps(payloads.network_updates())),
+]
+
+
+def main(iterations=20):
+    backends = available_backends()
+    print 'default backend: %s' % backends[0]
+    print '%-24s %8s' % ('payload', 'size') + ''.join(
+        '%14s' % name for name in backends)
+    for label, data in PAYLOADS:
+        expected = json.loads(data)
+        row = '%-24s %6dkB' % (label, len(data) / 1024)
+        for name in backends:
+            decode = get_decoder(name)
+            if decode(data) != expected:
+                row += '%14s' % 'INCORRECT'
+                continue
+            seconds = min(timeit.repeat(
+                lambda: decode(data), number=iterations,
+                repeat=3)) / iterations
+            row += '%11.2f ms' % (seconds * 1e3)
+        print row
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+"""
+Measure the cold import time of the client in fresh interpreters. The
+"eager" case also imports the dependencies the client loads on first use,
+which is what importing linkedin_json_client.api used to cost.
+
+    python benchmarks/bench_import.py [runs]
+"""
+import os
+import subprocess
+import sys
+
+CASES = [
+    ('constants', 'import linkedin_json_client.constants'),
+    ('api', 'import linkedin_json_client.api'),
+    ('api (eager)', 'import linkedin_json_client.api, oauth2, httplib2, '
+                    'simplejson, httplib, concurrent.futures, '
+                    'linkedin_json_client.records'),
+    ('api + client', 'import linkedin_json_client.api as api; '
+                     'api.LinkedInJsonAPI("key", "secret")'),
+]
+
+TIMER = 'import time; t = time.time(); %s; print time.time() - t'
+
+
+def import_time(statement):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        [os.getcwd(), os.environ.get('PYTHONPATH', '')]))
+    return float(subprocess.check_output(
+        [sys.executable, '-c', TIMER % statement], env=env))
+
+
+def main(runs=15):
+    print '%-14s %10s %10s' % ('import', 'median', 'min')
+    for name, statement in CASES:
+        times = sorted(import_time(statement) for i in range(runs))
+        print '%-14s %7.1f ms %7.1f ms' % (
+            name, times[len(times) / 2] * 1000, times[0] * 1000)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""
+Compare the per-request cost of signing LinkedIn requests with
+oauth.Client (a generic oauth.Request per call) and with OAuthSigner.
+
+    python benchmarks/bench_signing.py [iterations]
+"""
+import sys
+import timeit
+import urllib
+
+import oauth2 as oauth
+
+from linkedin_json_client.api import LinkedInJsonAPI
+from linkedin_json_client.signing import OAuthSigner
+
+CONSUMER = oauth.Consumer('q00tdja3bfzo', 'c0nsum3r-s3cr3t')
+TOKEN = oauth.Token(
+    'ef0bfbcc-1144-4c5d-a73b-b40c26605da2',
+    '76310eea-fd89-4c44-a9db-0ee61de2c527')
+GET_URI = LinkedInJsonAPI.api_profile_connections_url + (
+    ':(id,first-name,last-name,headline,location:(name),industry)?%s' %
+    urllib.urlencode({'format': 'json', 'start': 0, 'count': 500}))
+POST_URI = LinkedInJsonAPI.api_shares_url + '?format=json'
+POST_BODY = '<?xml version="1.0" encoding="UTF-8"?><share>...</share>'
+POST_HEADERS = {'Content-Type': 'application/xml'}
+
+
+def oauth_client_sign(method, uri, body, headers):
+    """
+    The signing steps of oauth.Client.request.
+    """
+    req = oauth.Request.from_consumer_and_token(
+        CONSUMER, token=TOKEN, http_method=method, http_url=uri, body=body)
+    req.sign_request(oauth.SignatureMethod_HMAC_SHA1(), CONSUMER, TOKEN)
+    if 'GET' == method:
+        return req.to_url()
+    return req.to_header(realm='https://api.linkedin.com')
+
+
+def main(iterations=20000):
+    signer = OAuthSigner(CONSUMER)
+    cases = [
+        ('GET', GET_URI, '', None),
+        ('POST', POST_URI, POST_BODY, POST_HEADERS),
+    ]
+    print '%-6s %14s %14s %8s' % ('method', 'oauth.Client', 'OAuthSigner',
+                                  'speedup')
+    for method, uri, body, headers in cases:
+        before = min(timeit.repeat(
+            lambda: oauth_client_sign(method, uri, body, headers),
+            number=iterations, repeat=3)) / iterations
+        after = min(timeit.repeat(
+            lambda: signer.sign_request(method, uri, body, headers, TOKEN),
+            number=iterations, repeat=3)) / iterations
+        print '%-6s %11.1f us %11.1f us %7.1fx' % (
+            method, before * 1e6, after * 1e6, before / after)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -1,12 +1,30 @@
 #! usr/bin/env python
+import calendar
 from datetime import datetime
+import socket
 import time
 import urllib
 import urlparse
-import oauth2 as oauth
-import simplejson
 
+from linkedin_json_client.cache import request_key
+from linkedin_json_client.coalesce import SingleFlight
+from linkedin_json_client.concurrency import imap_unordered
+from linkedin_json_client.decoders import get_decoder
 from linkedin_json_client.errors import LinkedInApiJsonClientError
+from linkedin_json_client.instrumentation import (
+    RequestEvent, endpoint_template)
+from linkedin_json_client.lazy import LazyModule, lazy_attribute
+from linkedin_json_client.pool import ConnectionPool
+from linkedin_json_client.projections import (
+    Projection, compile_projection, split_projection)
+from linkedin_json_client.signing import OAuthSigner
+from linkedin_json_client.streaming import iter_array_items
+
+futures = LazyModule('concurrent.futures')
+httplib = LazyModule('httplib')
+httplib2 = LazyModule('httplib2')
+oauth = LazyModule('oauth2')
+records = LazyModule('linkedin_json_client.records')
 
 
 class LinkedInJsonAPI(object):
@@ -34,21 +52,92 @@ class LinkedInJsonAPI(object):
         'ANSW', 'APPS', 'CONN', 'JOBS', 'JGRP', 'PICT', 'RECU', 'PRFU',
         'QSTN', 'STAT']
 
-    def __init__(self, ck, cs):
+    def __init__(self, ck, cs, pool_size=10, pool_idle_timeout=60,
+        cache=None, rate_limiter=None, retry_policy=None, fast_signing=False,
+        json_decoder=None, records=False, coalesce=False, observers=None,
+        recorder=None, circuit_breaker=None, hedge_policy=None):
+        """
+        Requests are sent through a pool of keep-alive connections owned by
+        this instance. "pool_size" is the number of idle connections kept and
+        "pool_idle_timeout" is the number of seconds before an idle
+        connection is closed. When "cache" is a ResponseCache, or an
+        SQLiteResponseCache shared between processes, GET responses are
+        served from it and a token's entries are invalidated by its writes.
+        When "rate_limiter" is a RateLimiter, calls block until the consumer
+        and member limits allow them. When "retry_policy" is a RetryPolicy,
+        failed calls are retried within its deadline. When
+        "fast_signing" is True, requests are signed by an OAuthSigner,
+        which caches signing keys, instead of oauth.Client. "json_decoder"
+        is a JSON backend name ('ujson', 'simplejson' or 'json') or a
+        decoding function, by default the fastest installed backend. When
+        "records" is True, profiles are returned as compact ProfileRecords
+        instead of dicts. When "coalesce" is True, concurrent identical GETs
+        are merged into a single call whose result is shared. "observers"
+        are callables passed a RequestEvent after every request, e.g. a
+        MetricsObserver; more can be appended to the "observers" list. When
+        "recorder" is a CassetteRecorder, every request sent and its
+        response are recorded. When "circuit_breaker" is a CircuitBreaker,
+        calls to an endpoint failing too often, or too slowly, raise a
+        CircuitOpenError without being sent. When "hedge_policy" is a
+        HedgePolicy, a GET slower than usual is sent again and the first
+        response is used.
+        """
         self.consumer_key = ck
         self.consumer_secret = cs
-        self.consumer = oauth.Consumer(self.consumer_key, self.consumer_secret)
+        self.pool_size = pool_size
+        self.pool_idle_timeout = pool_idle_timeout
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.fast_signing = fast_signing
+        self.decode = get_decoder(json_decoder)
+        self.records = records
+        self.coalescer = SingleFlight() if coalesce else None
+        self.observers = list(observers or [])
+        self.recorder = recorder
+        self.circuit_breaker = circuit_breaker
+        self.hedge_policy = hedge_policy
 
     def check_network_code(self, code):
         if code not in self.valid_network_update_codes:
             raise ValueError('Code %s not a valid update code' % code)
 
+    def check_response(self, resp, content):
+        """
+        Throw a LinkedInApiJsonClientError when the response is an error.
+        """
+        if 400 <= resp.status and content:
+            try:
+                error_json = self.decode(content)
+            except ValueError:
+                error_json = None
+            if not isinstance(error_json, dict):
+                # if not JSON, usually key=value pairs
+                error_json = {
+                    u'errorCode': u'unknown',
+                    u'message': u'%s' % dict(urlparse.parse_qsl(content)),
+                    u'status': u'unknown',
+                    u'timestamp': u'%s' % datetime.now()
+                }
+            raise LinkedInApiJsonClientError(error_json)
+
+    @lazy_attribute
+    def consumer(self):
+        """
+        The oauth.Consumer of the client, created on first use, so that
+        creating a client does not import oauth2.
+        """
+        return oauth.Consumer(self.consumer_key, self.consumer_secret)
+
     def dt_obj_to_string(self, dtobj):
-        if (type(dtobj) == type(int) or type(dtobj) == type(str) or
-            type(dtobj) == type(long)):
+        """
+        Convert a timestamp to UTC milliseconds. Naive datetimes are taken
+        to be in UTC; integers and strings are returned unchanged.
+        """
+        if isinstance(dtobj, (int, long, basestring)):
             return dtobj
-        elif hasattr(dtobj, 'timetuple'):
-            return time.mktime(int(dtobj.timetuple())*1000)
+        elif hasattr(dtobj, 'utctimetuple'):
+            return calendar.timegm(dtobj.utctimetuple()) * 1000
         else:
             raise TypeError('Inappropriate argument type - use either a '
                             'datetime object, string, or integer for '
@@ -73,8 +162,8 @@ class LinkedInJsonAPI(object):
         """
         token = self.get_user_token(access_token)
         url = self.api_comment_feed_url % {'NETWORK_UPDATE_KEY': network_key}
-        return simplejson.loads(self.request(
-            url, query_args, 'GET', headers=headers, token=token))
+        return self.request(
+            url, query_args, 'GET', headers=headers, token=token, decode=True)
 
     def get_email_address(self, access_token, headers=None, **query_args):
         """
@@ -96,18 +185,7 @@ class LinkedInJsonAPI(object):
         representing UTC with millisecond precision or a Python datetime
         object.
         """
-        if 'type' in query_args.keys():
-            assert type(query_args['type']) == type(list()),\
-                'Keyword argument "type" must be of type "list"'
-            [self.check_network_code(c) for c in query_args['type']]
-
-        if 'before' in query_args.keys():
-            query_args['before'] = (self.dt_obj_to_string(query_args['before'])
-                                if query_args['before'] else None)
-        if 'after' in query_args.keys():
-            query_args['after'] = (self.dt_obj_to_string(query_args['after'])
-                               if query_args['after'] else None)
-
+        self.prepare_network_update_args(query_args)
         token = self.get_user_token(access_token)
         return self.request(
             self.api_network_update_url, query_args, 'GET', token=token)
@@ -134,16 +212,23 @@ class LinkedInJsonAPI(object):
         Get the connections of the current user. Valid keyword arguments are
         "count" and "start" for the number of profiles you wish returned.
         Types are automatically converted from integer to string for URL
-        formatting if necessary.
+        formatting if necessary. In records mode, the "values" of the
+        returned page are ProfileRecords.
         """
         token = self.get_user_token(access_token)
         url = self.api_profile_connections_url
         if selectors:
-            assert type(selectors) == type([]), (
-                '"Keyword argument "selectors" must be of type "list"')
+            assert isinstance(selectors, (list, Projection)), (
+                '"Keyword argument "selectors" must be of type "list" or '
+                '"Projection"')
             url = self.prepare_field_selectors(selectors, url)
-        return simplejson.loads(self.request(
-            url, query_args, 'GET', headers=headers, token=token))
+        page = self.request(
+            url, query_args, 'GET', headers=headers, token=token, decode=True)
+        if self.records and 'values' in page:
+            page['values'] = [
+                records.ProfileRecord.from_json(person)
+                for person in page['values']]
+        return page
 
     def get_user_profile(
         self, access_token, selectors=None, headers=None, **query_args):
@@ -151,16 +236,97 @@ class LinkedInJsonAPI(object):
         Get a user profile.  If keyword argument "id" is not supplied, this
         returns the current user's profile, else it will return the profile of
         the user whose id is specified.  The "selectors" keyword argument takes
-        a list of LinkedIn compatible field selectors.
+        a list of LinkedIn compatible field selectors, or a Projection
+        compiled by compile_projection. In records mode, a ProfileRecord
+        is returned.
         """
         token = self.get_user_token(access_token)
         url = self.api_profile_url
         if selectors:
-            assert type(selectors) == type([]), (
-                '"Keyword argument "selectors" must be of type "list"')
+            assert isinstance(selectors, (list, Projection)), (
+                '"Keyword argument "selectors" must be of type "list" or '
+                '"Projection"')
             url = self.prepare_field_selectors(selectors, url)
-        return simplejson.loads(self.request(
-            url, query_args, 'GET', token=token, headers=headers))
+        profile = self.request(
+            url, query_args, 'GET', token=token, headers=headers, decode=True)
+        if self.records:
+            return records.ProfileRecord.from_json(profile)
+        return profile
+
+    def get_user_profile_scattered(
+        self, access_token, selectors, groups=4, timeout=None, headers=None,
+        **query_args):
+        """
+        Like get_user_profile, but split the selectors into up to "groups"
+        smaller requests, see split_projection, which are sent in parallel
+        and merged into one profile. "selectors" is a list of selectors or
+        the input of compile_projection. When a group fails, or is not
+        answered within "timeout" seconds, the profile is returned without
+        its fields and their selectors are listed under "_failedSelectors".
+        The error of the first failed group is raised when every group
+        fails.
+        """
+        token = self.get_user_token(access_token)
+        parts = split_projection(selectors, groups)
+
+        def fetch(part):
+            if all(isinstance(item, basestring) for item in part):
+                url = self.prepare_field_selectors(part, self.api_profile_url)
+            else:
+                url = self.prepare_field_selectors(
+                    compile_projection(part), self.api_profile_url)
+            return self.request(
+                url, query_args, 'GET', token=token, headers=headers,
+                decode=True)
+
+        executor = futures.ThreadPoolExecutor(max_workers=len(parts))
+        try:
+            pending = [executor.submit(fetch, part) for part in parts]
+            futures.wait(pending, timeout=timeout)
+        finally:
+            # do not wait for the groups that timed out
+            executor.shutdown(wait=False)
+
+        profile = {}
+        failed = []
+        error = None
+        for part, future in zip(parts, pending):
+            try:
+                profile.update(future.result(timeout=0))
+            except Exception as e:
+                error = error or e
+                failed.extend(
+                    item if isinstance(item, basestring) else
+                    compile_projection([item]).suffix[2:-1] for item in part)
+        if len(failed) == sum(len(part) for part in parts):
+            raise error
+        if failed:
+            profile['_failedSelectors'] = failed
+        if self.records:
+            return records.ProfileRecord.from_json(profile)
+        return profile
+
+    def get_user_profiles_many(
+        self, access_tokens, selectors=None, headers=None, max_workers=10,
+        **query_args):
+        """
+        Get the profiles for many access tokens concurrently. Calls run on a
+        pool of "max_workers" threads and results are yielded in completion
+        order as (access_token, profile, error) tuples. When a call fails,
+        profile is None and error is the raised exception (usually a
+        LinkedInApiJsonClientError), so one bad token does not stop the batch.
+        """
+        def fetch(access_token):
+            return self.get_user_profile(
+                access_token, selectors=selectors, headers=headers,
+                **query_args)
+
+        for access_token, future in imap_unordered(
+            fetch, access_tokens, max_workers=max_workers):
+            try:
+                yield access_token, future.result(), None
+            except Exception as e:
+                yield access_token, None, e
 
     def get_user_token(self, access_token):
         """
@@ -200,6 +366,50 @@ class LinkedInJsonAPI(object):
                 'auth': auth_xml, 'body': body, 'subject': subject,
                 'recipients': recipient_xml})
 
+    def is_throttled(self, resp, content):
+        """
+        Whether LinkedIn rejected a call for exceeding its throttle limits.
+        """
+        return 429 == resp.status or (
+            403 == resp.status and 'throttle' in (content or '').lower())
+
+    def iter_user_connections(
+        self, access_token, selectors=None, query_args=None, headers=None,
+        page_size=500):
+        """
+        Iterate over all connections of the current user, fetching
+        "page_size" connections per request. Each person is yielded as soon
+        as its page arrives, while the next page is fetched in the
+        background, so at most two pages are held in memory. An optional
+        "start" in query_args sets the first connection to fetch.
+        """
+        query_args = dict(query_args or {})
+        start = int(query_args.pop('start', 0))
+
+        def fetch(start):
+            page_args = dict(query_args, start=start, count=page_size)
+            return self.get_user_connections(
+                access_token, selectors=selectors, query_args=page_args,
+                headers=headers)
+
+        executor = futures.ThreadPoolExecutor(max_workers=1)
+        try:
+            future = executor.submit(fetch, start)
+            while future:
+                page = future.result()
+                values = page.get('values', [])
+                start += len(values)
+                total = page.get('_total')
+                if total is None:
+                    has_next = len(values) >= page_size
+                else:
+                    has_next = bool(values) and start < total
+                future = executor.submit(fetch, start) if has_next else None
+                for person in values:
+                    yield person
+        finally:
+            executor.shutdown(wait=False)
+
     def message_factory(self, recipients, subject, body):
         """
         Create message XML for use with LinkedIn API. LinkedIn expects the
@@ -221,18 +431,56 @@ class LinkedInJsonAPI(object):
             "<subject>%s</subject><body>%s</body></mailbox-item>" %
             ("".join(recipient_xml_list), subject, body))
 
+    @lazy_attribute
+    def hedge_executor(self):
+        """
+        The threads sending hedged GETs, started on first use, so that a
+        hedge policy may also be set after the client is created.
+        """
+        return futures.ThreadPoolExecutor(
+            max_workers=self.hedge_policy.max_workers)
+
+    @property
+    def network_errors(self):
+        """
+        The exceptions of failed connections, which may be retried.
+        """
+        return socket.error, httplib.HTTPException, httplib2.HttpLib2Error
+
+    @lazy_attribute
+    def pool(self):
+        return ConnectionPool(
+            self.consumer, size=self.pool_size,
+            idle_timeout=self.pool_idle_timeout)
+
     def prepare_field_selectors(self, selectors, url):
-        prep_url = url
-        selector_string = ':('
-        for s in selectors:
-            selector_string += s + ','
-        selector_string = selector_string.strip(',')
-        selector_string += ')'
-        prep_url += selector_string
-        return prep_url
+        """
+        Append the selectors to url. "selectors" is either a list of
+        selector strings or a precompiled Projection.
+        """
+        if isinstance(selectors, Projection):
+            return url + selectors.suffix
+        return '%s:(%s)' % (url, ','.join(selectors))
+
+    def prepare_network_update_args(self, query_args):
+        """
+        Validate the update types and convert the timestamps of network
+        update query_args in place.
+        """
+        if 'type' in query_args.keys():
+            assert type(query_args['type']) == type(list()),\
+                'Keyword argument "type" must be of type "list"'
+            [self.check_network_code(c) for c in query_args['type']]
+
+        if 'before' in query_args.keys():
+            query_args['before'] = (self.dt_obj_to_string(query_args['before'])
+                                if query_args['before'] else None)
+        if 'after' in query_args.keys():
+            query_args['after'] = (self.dt_obj_to_string(query_args['after'])
+                               if query_args['after'] else None)
 
     def request(self, url, query_args, method, body='', headers=None,
-        token=None):
+        token=None, decode=False):
         """
         Send a LinkedInApi request and return the response content.
         Also, throw an error when operation fails.
@@ -240,27 +488,297 @@ class LinkedInJsonAPI(object):
             query_args - any query parameters for 'url'
             method - request method ('POST', 'GET', etc.)
             token - token required for authenticated API requests
+            decode - return the decoded JSON instead of the content
+        When observers are attached, each is called with a RequestEvent
+        describing the call once it completes or fails.
         """
-        client = oauth.Client(self.consumer, token=token)
-        query_args.update(self.format)
-        resp, content = client.request(
-            url + '?%s' % urllib.urlencode(query_args), method,
-            body=body, headers=headers)
+        if not self.observers:
+            return self._request(
+                url, query_args, method, body, headers, token, decode)
+
+        event = RequestEvent(endpoint_template(url), method)
+        start = time.time()
+        try:
+            return self._request(
+                url, query_args, method, body, headers, token, decode, event)
+        except Exception as e:
+            event.error = e
+            raise
+        finally:
+            event.duration = time.time() - start
+            for observer in self.observers:
+                observer(event)
+
+    def _request(self, url, query_args, method, body, headers, token, decode,
+        event=None):
+        query_args = dict(query_args or {}, **self.format)
+        cache_key = content = None
+        if self.cache is not None and 'GET' == method:
+            cache_key = self.cache.make_key(token, url, query_args, headers)
+            content = self.cache.get(cache_key)
+            if content is not None and event is not None:
+                event.source = 'cache'
+
+        if content is None:
+            def fetch():
+                breaker = self.circuit_breaker
+                if breaker is not None:
+                    endpoint = endpoint_template(url)
+                    breaker.allow(endpoint)
+                started = time.time()
+                status = None
+                try:
+                    resp, content = self._send_with_retries(
+                        url + '?%s' % urllib.urlencode(query_args), method,
+                        body, headers, token, event)
+                    status = resp.status
+                finally:
+                    # always release an allowed call, or a half-open
+                    # circuit would wait for its probe forever
+                    if breaker is not None:
+                        breaker.record(
+                            endpoint, status, time.time() - started)
+                if self.recorder is not None:
+                    self.recorder.record(
+                        method, url, query_args, body, resp, content, started,
+                        time.time() - started)
+                if event is not None:
+                    event.source = 'network'
+                    event.status = resp.status
+                    event.request_id = resp.get('x-li-request-id')
+                self.check_response(resp, content)
+                return content
+
+            if self.coalescer is not None and 'GET' == method:
+                if event is not None:
+                    # unless this call is the one sending the request
+                    event.source = 'coalesced'
+                content = self.coalescer.do(
+                    request_key(token, url, query_args, headers), fetch)
+            else:
+                content = fetch()
+
+            if cache_key is not None:
+                self.cache.set(cache_key, content)
+            elif self.cache is not None and token is not None:
+                # a write may change any cached read of this member
+                self.cache.invalidate(token)
+
+        if event is None:
+            return self.decode(content) if decode else content
+        event.bytes = len(content)
+        if decode:
+            start = time.time()
+            content = self.decode(content)
+            event.decode_time = time.time() - start
+        return content
 
-        # an error occurred
-        if 400 <= resp.status and content:
+    def request_stream(self, url, query_args, token=None, headers=None,
+        chunk_size=65536):
+        """
+        Send a signed GET request and yield the response content in chunks
+        as it arrives, instead of reading it into memory at once. Throws a
+        LinkedInApiJsonClientError when the operation fails. The request is
+        sent on a keep-alive connection of the pool, through the rate
+        limiter, the circuit breaker and the observers, but it is never
+        retried, cached, coalesced or recorded, because its content is not
+        held in memory.
+        """
+        query_args = dict(query_args or {}, **self.format)
+        uri, body, headers = self.stream_signer.sign_request(
+            'GET', url + '?%s' % urllib.urlencode(query_args),
+            headers=headers, token=token)
+        scheme, netloc, path, query = urlparse.urlsplit(uri)[:4]
+
+        endpoint = endpoint_template(url)
+        event = RequestEvent(endpoint, 'GET') if self.observers else None
+        breaker = self.circuit_breaker
+        if breaker is not None:
+            breaker.allow(endpoint)
+        token_key = token.key if token else None
+        # share the connections httplib2 keeps for the same host
+        conn_key = '%s:%s' % (scheme, netloc)
+        start = time.time()
+        client = resp = None
+        complete = False
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(self.consumer_key, token_key)
+            client = self.pool.acquire(token)
+            while True:
+                conn = client.connections.get(conn_key)
+                reused = conn is not None
+                if conn is None:
+                    if 'https' == scheme:
+                        conn = httplib.HTTPSConnection(
+                            netloc, timeout=client.timeout)
+                    else:
+                        conn = httplib.HTTPConnection(
+                            netloc, timeout=client.timeout)
+                    client.connections[conn_key] = conn
+                try:
+                    conn.request(
+                        'GET', '%s?%s' % (path, query), headers=headers)
+                    resp = conn.getresponse()
+                    break
+                except self.network_errors:
+                    conn.close()
+                    del client.connections[conn_key]
+                    # like httplib2, retry once when the server closed an
+                    # idle connection
+                    if not reused:
+                        raise
+            if breaker is not None:
+                breaker.record(endpoint, resp.status, time.time() - start)
+            if event is not None:
+                event.status = resp.status
+                event.request_id = resp.getheader('x-li-request-id')
+            if 400 <= resp.status:
+                content = resp.read()
+                complete = True
+                if event is not None:
+                    event.bytes = len(content)
+                if (self.rate_limiter is not None and
+                    self.is_throttled(resp, content)):
+                    self.rate_limiter.throttled(self.consumer_key, token_key)
+                self.check_response(resp, content)
+            while True:
+                chunk = resp.read(chunk_size)
+                if not chunk:
+                    break
+                if event is not None:
+                    event.bytes += len(chunk)
+                yield chunk
+            complete = True
+        except Exception as e:
+            if event is not None:
+                event.error = e
+            raise
+        finally:
+            if breaker is not None and resp is None:
+                # always release an allowed call, see _request
+                breaker.record(endpoint, None, time.time() - start)
+            if client is not None:
+                if not complete:
+                    # unread content would corrupt the next response
+                    conn = client.connections.pop(conn_key, None)
+                    if conn is not None:
+                        conn.close()
+                self.pool.release(client)
+            if event is not None:
+                event.duration = event.network_time = time.time() - start
+                for observer in self.observers:
+                    observer(event)
+
+    def _send(self, uri, method, body, headers, token, timeout=None,
+        event=None):
+        """
+        Sign and send a single request through the connection pool, adding
+        the time spent to event, when given.
+        """
+        token_key = token.key if token else None
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(self.consumer_key, token_key)
+
+        if event is not None:
+            start = time.time()
+        with self.pool.connection(token, timeout) as client:
+            if self.signer is None:
+                resp, content = client.request(
+                    uri, method, body=body, headers=headers)
+            else:
+                uri, body, headers = self.signer.sign_request(
+                    method, uri, body=body, headers=headers, token=token)
+                if event is not None:
+                    signed = time.time()
+                    event.sign_time += signed - start
+                    start = signed
+                # the request is already signed, bypass oauth.Client
+                resp, content = httplib2.Http.request(
+                    client, uri, method, body=body, headers=headers)
+        if event is not None:
+            event.network_time += time.time() - start
+
+        if self.rate_limiter is not None and self.is_throttled(resp, content):
+            self.rate_limiter.throttled(self.consumer_key, token_key)
+        return resp, content
+
+    def _send_hedged(self, uri, method, body, headers, token, timeout=None,
+        event=None):
+        """
+        Send a GET, and send it again when the first attempt is slower than
+        the delay of the hedge policy, returning the first response. The
+        other attempt is left to finish in the background.
+        """
+        policy = self.hedge_policy
+        endpoint = endpoint_template(uri)
+        delay = policy.delay(endpoint)
+        start = time.time()
+        first = self.hedge_executor.submit(
+            self._send, uri, method, body, headers, token, timeout)
+        first.add_done_callback(
+            lambda f: policy.observe(endpoint, time.time() - start))
+        try:
+            if delay is None:
+                return first.result()
             try:
-                raise LinkedInApiJsonClientError(simplejson.loads(content))
-            except:
-                # if not JSON, usually key=value pairs
-                error_json = {
-                    u'errorCode': u'unknown',
-                    u'message': u'%s' % dict(urlparse.parse_qsl(content)),
-                    u'status': u'unknown',
-                    u'timestamp': u'%s' % datetime.now()
-                }
-                raise LinkedInApiJsonClientError(error_json)
-        return content
+                return first.result(delay)
+            except futures.TimeoutError:
+                if not policy.fire():
+                    return first.result()
+            hedge = self.hedge_executor.submit(
+                self._send, uri, method, body, headers, token, timeout)
+            done, pending = futures.wait(
+                [first, hedge], return_when=futures.FIRST_COMPLETED)
+            winner = hedge if hedge in done else first
+            if winner.exception() is not None:
+                # prefer the other attempt, unless it fails too
+                other = first if winner is hedge else hedge
+                if other.exception() is None:
+                    winner = other
+            if winner is hedge:
+                policy.won()
+            return winner.result()
+        finally:
+            if event is not None:
+                event.network_time += time.time() - start
+
+    def _send_with_retries(self, uri, method, body, headers, token,
+        event=None):
+        """
+        Send a request, retrying it as allowed by the retry policy.
+        """
+        send = self._send
+        if self.hedge_policy is not None and 'GET' == method:
+            send = self._send_hedged
+        policy = self.retry_policy
+        if policy is None or not policy.can_retry(method):
+            return send(uri, method, body, headers, token, event=event)
+
+        deadline = policy.deadline and time.time() + policy.deadline
+        attempt = 0
+        while True:
+            attempt += 1
+            if event is not None:
+                event.retries = attempt - 1
+            timeout = deadline and max(0.001, deadline - time.time())
+            try:
+                resp, content = send(
+                    uri, method, body, headers, token, timeout, event)
+            except self.network_errors:
+                if attempt >= policy.max_attempts:
+                    raise
+                delay = policy.delay(attempt)
+                if deadline and time.time() + delay >= deadline:
+                    raise
+            else:
+                if (resp.status not in policy.retry_statuses or
+                    attempt >= policy.max_attempts):
+                    return resp, content
+                delay = policy.delay(attempt, resp.get('retry-after'))
+                if deadline and time.time() + delay >= deadline:
+                    return resp, content
+            time.sleep(delay)
 
     def send_invitation(
         self, access_token, recipients, subject, body, **query_args):
@@ -357,6 +875,46 @@ class LinkedInJsonAPI(object):
             url, {}, 'POST', body=xml_request, headers={
                 'Content-Type': 'application/xml'}, token=token)
 
+    @lazy_attribute
+    def signer(self):
+        return OAuthSigner(self.consumer) if self.fast_signing else None
+
+    def stream_network_updates(self, access_token, **query_args):
+        """
+        Like get_network_updates, but yield each decoded update as soon as
+        it has been read from the response, keeping memory flat.
+        See request_stream: the call is never retried, cached or recorded.
+        """
+        self.prepare_network_update_args(query_args)
+        token = self.get_user_token(access_token)
+        return iter_array_items(self.request_stream(
+            self.api_network_update_url, query_args, token=token))
+
+    @lazy_attribute
+    def stream_signer(self):
+        return self.signer or OAuthSigner(self.consumer)
+
+    def stream_user_connections(
+        self, access_token, selectors=None, query_args=None, headers=None):
+        """
+        Like get_user_connections, but yield each connection as soon as it
+        has been read from the response, keeping memory flat.
+        See request_stream: the call is never retried, cached or recorded.
+        """
+        token = self.get_user_token(access_token)
+        url = self.api_profile_connections_url
+        if selectors:
+            assert isinstance(selectors, (list, Projection)), (
+                '"Keyword argument "selectors" must be of type "list" or '
+                '"Projection"')
+            url = self.prepare_field_selectors(selectors, url)
+        people = iter_array_items(self.request_stream(
+            url, query_args, token=token, headers=headers))
+        if self.records:
+            return (records.ProfileRecord.from_json(person)
+                    for person in people)
+        return people
+
     def submit_comment(self, access_token, network_key, bd):
         """
         Submit a comment to a network update. Requires the update key for
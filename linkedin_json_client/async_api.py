@@ -0,0 +1,80 @@
+from functools import wraps
+
+from linkedin_json_client.api import LinkedInJsonAPI
+from linkedin_json_client.lazy import LazyModule
+
+futures = LazyModule('concurrent.futures')
+
+
+def _async_method(name):
+    """
+    Wrap the LinkedInJsonAPI method "name" so that it runs on the executor
+    and returns a concurrent.futures.Future instead of blocking.
+    """
+    sync_method = getattr(LinkedInJsonAPI, name)
+
+    @wraps(sync_method)
+    def method(self, *args, **kwargs):
+        return self.executor.submit(
+            getattr(self.api, name), *args, **kwargs)
+    return method
+
+
+def blocking(api):
+    """
+    Return the blocking LinkedInJsonAPI of api, either an
+    AsyncLinkedInJsonAPI or a LinkedInJsonAPI.
+    """
+    if isinstance(api, AsyncLinkedInJsonAPI):
+        return api.api
+    return api
+
+
+class AsyncLinkedInJsonAPI(object):
+    """
+    A non-blocking LinkedInJsonAPI. Every API method returns a
+    concurrent.futures.Future resolving to the same value (or raising the
+    same LinkedInApiJsonClientError) as the blocking client, which it wraps
+    as "api" and runs on its executor. Other attributes, including helpers
+    such as iter_user_connections and get_user_profiles_many, are those of
+    the blocking client, so they block and return values as usual.
+
+    From an asyncio event loop, await the futures with asyncio.wrap_future;
+    from tornado, yield them directly; otherwise use add_done_callback.
+    """
+
+    def __init__(self, ck, cs, max_workers=10, executor=None,
+        api_class=LinkedInJsonAPI, **kwargs):
+        """
+        "max_workers" bounds the number of concurrent LinkedIn calls, unless
+        an existing "executor" is provided. By default the connection pool is
+        sized so that every worker keeps a warm connection. The other
+        keyword arguments are those of "api_class".
+        """
+        kwargs.setdefault('pool_size', max_workers)
+        self.api = api_class(ck, cs, **kwargs)
+        self.executor = executor or futures.ThreadPoolExecutor(
+            max_workers=max_workers)
+
+    def __getattr__(self, name):
+        return getattr(self.api, name)
+
+    def close(self, wait=True):
+        """
+        Shutdown the executor and close pooled connections.
+        """
+        self.executor.shutdown(wait=wait)
+        self.api.pool.clear()
+
+    get_access_token = _async_method('get_access_token')
+    get_comment_feed = _async_method('get_comment_feed')
+    get_email_address = _async_method('get_email_address')
+    get_network_updates = _async_method('get_network_updates')
+    get_request_token = _async_method('get_request_token')
+    get_user_connections = _async_method('get_user_connections')
+    get_user_profile = _async_method('get_user_profile')
+    send_invitation = _async_method('send_invitation')
+    send_message = _async_method('send_message')
+    set_status_update = _async_method('set_status_update')
+    share = _async_method('share')
+    submit_comment = _async_method('submit_comment')
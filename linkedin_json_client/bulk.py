@@ -0,0 +1,144 @@
+from collections import namedtuple
+import os
+
+import simplejson
+
+from linkedin_json_client.async_api import blocking
+from linkedin_json_client.concurrency import imap_unordered
+from linkedin_json_client.errors import LinkedInApiJsonClientError
+
+BulkResult = namedtuple('BulkResult', ['recipient', 'ok', 'error'])
+
+
+def _error_text(error):
+    """
+    Return the message of error as unicode, whether it was given as unicode
+    or as (maybe not ASCII) bytes.
+    """
+    try:
+        return unicode(error)
+    except UnicodeError:
+        return str(error).decode('utf-8', 'replace')
+
+
+class BulkSender(object):
+    """
+    Sends messages and invitations to many recipients for one member.
+    Message recipients are split into chunks of "chunk_size" (the most
+    LinkedIn accepts per message), and chunks are sent concurrently by
+    "max_workers" threads. A BulkResult is yielded for every recipient as
+    soon as its chunk finishes.
+
+    When "report_path" is set, every result is appended to that file as a
+    JSON line. Recipients already reported as successful are skipped, so an
+    interrupted run resumes where it stopped, retrying only the failures.
+    "api" is a LinkedInJsonAPI, or an AsyncLinkedInJsonAPI whose blocking
+    client is used.
+    """
+
+    def __init__(self, api, access_token, chunk_size=10, max_workers=4,
+        report_path=None):
+        self.api = blocking(api)
+        self.access_token = access_token
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.report_path = report_path
+        self.completed = self._read_report()
+
+    def _read_report(self):
+        completed = set()
+        if self.report_path and os.path.exists(self.report_path):
+            with open(self.report_path) as report:
+                for line in report:
+                    try:
+                        result = simplejson.loads(line)
+                    except ValueError:
+                        # a line cut short by a crash
+                        continue
+                    if result['ok']:
+                        completed.add(result['recipient'])
+        return completed
+
+    def _report(self, results):
+        """
+        Record results, then yield them.
+        """
+        if self.report_path:
+            with open(self.report_path, 'a') as report:
+                for result in results:
+                    report.write(simplejson.dumps({
+                        'recipient': result.recipient, 'ok': result.ok,
+                        'error': result.error and _error_text(result.error)}))
+                    report.write('\n')
+                report.flush()
+        for result in results:
+            if result.ok:
+                self.completed.add(result.recipient)
+            yield result
+
+    def _chunks(self, recipients):
+        chunk = []
+        for recipient in recipients:
+            if recipient in self.completed:
+                continue
+            chunk.append(recipient)
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _send_chunk(self, chunk, subject, body):
+        """
+        Send one message to chunk. When LinkedIn rejects the request as
+        invalid, nothing was sent, so the chunk is split to find the
+        recipients it rejects.
+        """
+        try:
+            self.api.send_message(self.access_token, chunk, subject, body)
+        except LinkedInApiJsonClientError as e:
+            if 400 != e.status or 1 == len(chunk):
+                return [BulkResult(r, False, e) for r in chunk]
+            middle = len(chunk) / 2
+            return (self._send_chunk(chunk[:middle], subject, body) +
+                    self._send_chunk(chunk[middle:], subject, body))
+        except Exception as e:
+            return [BulkResult(r, False, e) for r in chunk]
+        return [BulkResult(r, True, None) for r in chunk]
+
+    def send_messages(self, recipients, subject, body):
+        """
+        Send the message to every member id in recipients and yield a
+        BulkResult per recipient, in completion order.
+        """
+        def send(chunk):
+            return self._send_chunk(chunk, subject, body)
+
+        for chunk, future in imap_unordered(
+            send, self._chunks(recipients), max_workers=self.max_workers):
+            for result in self._report(future.result()):
+                yield result
+
+    def send_invitations(self, invitations, subject, body):
+        """
+        Send an invitation per item of invitations and yield a BulkResult
+        per recipient, in completion order. Each invitation is a dict with a
+        "recipient" and the keyword arguments of send_invitation
+        ("first_name" and "last_name", or "name" and "value").
+        """
+        def send(invitation):
+            kwargs = dict(invitation)
+            recipient = kwargs.pop('recipient')
+            try:
+                self.api.send_invitation(
+                    self.access_token, recipient, subject, body, **kwargs)
+            except Exception as e:
+                return [BulkResult(recipient, False, e)]
+            return [BulkResult(recipient, True, None)]
+
+        pending = (invitation for invitation in invitations
+                   if invitation['recipient'] not in self.completed)
+        for invitation, future in imap_unordered(
+            send, pending, max_workers=self.max_workers):
+            for result in self._report(future.result()):
+                yield result
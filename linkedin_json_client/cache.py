@@ -0,0 +1,238 @@
+from collections import OrderedDict
+import os
+import threading
+import time
+
+from linkedin_json_client.lazy import LazyModule
+
+sqlite3 = LazyModule('sqlite3')
+
+
+def _freeze(value):
+    """
+    A hashable copy of a query argument value, e.g. a list of update types.
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_freeze(v) for v in value))
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def request_key(token, url, query_args, headers=None):
+    """
+    Identify a request by its token, final URL, query arguments and
+    headers, which may change the response, e.g. x-li-format or
+    Accept-Language.
+    """
+    return (token.key if token else None, url, tuple(sorted(
+        (key, _freeze(value))
+        for key, value in (query_args or {}).items())), tuple(sorted(
+        (name.lower(), value) for name, value in (headers or {}).items())))
+
+
+class ResponseCache(object):
+    """
+    A thread-safe, in-process cache of GET response content. Entries are
+    keyed on the token, the final URL (including field selectors), the
+    query arguments and the request headers, expire after "ttl" seconds,
+    and the least recently used entry is evicted once "maxsize" entries
+    are stored.
+    """
+
+    def __init__(self, maxsize=1000, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0,
+        }
+
+    def make_key(self, token, url, query_args, headers=None):
+        return request_key(token, url, query_args, headers)
+
+    def get(self, key):
+        """
+        Return the cached content for key, or None when it is missing or
+        expired.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            expires, content = entry
+            if expires < time.time():
+                self._counters['expirations'] += 1
+                self._counters['misses'] += 1
+                return None
+            # re-insert to mark as most recently used
+            self._entries[key] = entry
+            self._counters['hits'] += 1
+            return content
+
+    def set(self, key, content):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time() + self.ttl, content)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def invalidate(self, token=None):
+        """
+        Drop the cached entries of token, or every entry when token is None.
+        """
+        with self._lock:
+            if token is None:
+                keys = list(self._entries)
+            else:
+                keys = [k for k in self._entries if k[0] == token.key]
+            for key in keys:
+                del self._entries[key]
+            self._counters['invalidations'] += len(keys)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['size'] = len(self._entries)
+        return stats
+
+
+class SQLiteResponseCache(object):
+    """
+    A ResponseCache stored in an SQLite file in WAL mode, so it is shared by
+    every thread and process using the same "path", e.g. the workers of a
+    web server, and a response fetched by one is served to all. Entries
+    expire after "ttl" seconds and the least recently used entries are
+    evicted once more than "maxsize" are stored. The counters of stats()
+    are those of this instance, its size is that of the shared file.
+    """
+
+    # seconds between updates of an entry's last access, which would
+    # otherwise turn every hit into a write
+    ACCESS_RESOLUTION = 1.0
+
+    def __init__(self, path, maxsize=10000, ttl=300, timeout=30):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0,
+        }
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'key TEXT PRIMARY KEY, token TEXT, expires REAL NOT NULL, '
+            'accessed REAL NOT NULL, content BLOB NOT NULL)')
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS responses_token ON responses (token)')
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS responses_accessed '
+            'ON responses (accessed)')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        # connections must not be shared with a forked child
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counters[name] += n
+
+    def make_key(self, token, url, query_args, headers=None):
+        key = request_key(token, url, query_args, headers)
+        return key[0], repr(key)
+
+    def get(self, key):
+        """
+        Return the cached content for key, or None when it is missing or
+        expired.
+        """
+        token_key, key = key
+        conn = self._connection()
+        row = conn.execute(
+            'SELECT expires, accessed, content FROM responses WHERE key = ?',
+            (key,)).fetchone()
+        if row is None:
+            self._count('misses')
+            return None
+        expires, accessed, content = row
+        now = time.time()
+        if expires < now:
+            conn.execute(
+                'DELETE FROM responses WHERE key = ? AND expires < ?',
+                (key, now))
+            self._count('expirations')
+            self._count('misses')
+            return None
+        if now - accessed > self.ACCESS_RESOLUTION:
+            conn.execute(
+                'UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+        self._count('hits')
+        return str(content)
+
+    def set(self, key, content):
+        token_key, key = key
+        now = time.time()
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO responses '
+                '(key, token, expires, accessed, content) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, token_key, now + self.ttl, now,
+                 sqlite3.Binary(content)))
+            evicted = conn.execute(
+                'DELETE FROM responses WHERE key IN ('
+                'SELECT key FROM responses ORDER BY accessed LIMIT max(0, '
+                '(SELECT COUNT(*) FROM responses) - ?))',
+                (self.maxsize,)).rowcount
+        except:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        if evicted:
+            self._count('evictions', evicted)
+
+    def invalidate(self, token=None):
+        """
+        Drop the cached entries of token, or every entry when token is None.
+        """
+        conn = self._connection()
+        if token is None:
+            cursor = conn.execute('DELETE FROM responses')
+        else:
+            cursor = conn.execute(
+                'DELETE FROM responses WHERE token = ?', (token.key,))
+        self._count('invalidations', cursor.rowcount)
+
+    def stats(self):
+        size = self._connection().execute(
+            'SELECT COUNT(*) FROM responses').fetchone()[0]
+        with self._lock:
+            stats = dict(self._counters)
+        stats['size'] = size
+        return stats
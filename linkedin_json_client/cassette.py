@@ -0,0 +1,228 @@
+"""
+Records API traffic to cassettes and replays it. A cassette is an
+append-only file of JSON lines, one per request/response pair, with OAuth
+tokens redacted, e.g.
+    api = LinkedInJsonAPI(key, secret, recorder=CassetteRecorder(path))
+Recorded responses are served back in-process by a replay_class client, or
+over HTTP by a FakeLinkedInServer given the cassette, and Cassette.replay
+re-sends the recorded requests to drive load at a multiple of the recorded
+rate.
+"""
+from itertools import cycle
+import re
+import threading
+import time
+import urlparse
+
+import httplib2
+import simplejson
+
+from linkedin_json_client.api import LinkedInJsonAPI
+from linkedin_json_client.concurrency import imap_unordered
+
+# the names of OAuth tokens, secrets and verifiers, and of the
+# x-li-auth-token header of profiles
+SECRET_NAME_RE = re.compile(
+    r'^(?:oauth_\w*(?:token|secret|verifier)\w*|x-li-auth-token)$', re.I)
+# their values in query strings and form-encoded content
+REDACT_RE = re.compile(r'(oauth_\w*(?:token|secret|verifier)\w*=)[^&"\s]+')
+REDACTED = 'REDACTED'
+
+# response headers worth keeping
+HEADERS = ('content-type', 'x-li-request-id')
+
+
+def redact_value(value):
+    """
+    A copy of a parsed JSON value, or of a dict of parameters, with the
+    values of secret names and of {"name": ..., "value": ...} headers with
+    a secret name redacted, whatever the order of their keys.
+    """
+    if isinstance(value, dict):
+        secret_header = (isinstance(value.get('name'), basestring) and
+                         SECRET_NAME_RE.match(value['name']))
+        return dict(
+            (key, REDACTED if SECRET_NAME_RE.match(key) or (
+                secret_header and 'value' == key) else redact_value(item))
+            for key, item in value.items())
+    if isinstance(value, list):
+        return [redact_value(item) for item in value]
+    if isinstance(value, basestring):
+        return REDACT_RE.sub(r'\1' + REDACTED, value)
+    return value
+
+
+def redact(text):
+    """
+    Return content with its tokens redacted. JSON content is redacted once
+    parsed, and anything else as a query string.
+    """
+    try:
+        parsed = simplejson.loads(text)
+    except ValueError:
+        parsed = None
+    if not isinstance(parsed, (dict, list)):
+        return REDACT_RE.sub(r'\1' + REDACTED, text)
+    return simplejson.dumps(redact_value(parsed), separators=(',', ':'))
+
+
+def normalize_query(query_args):
+    """
+    The query arguments as sorted string pairs, without the format and
+    OAuth arguments.
+    """
+    return tuple(sorted(
+        (key, '%s' % value) for key, value in query_args.items()
+        if 'format' != key and not key.startswith('oauth_')))
+
+
+def normalize(method, path, query_args):
+    """
+    The key matching a request to its recording: the method, the path
+    (including field selectors) and the normalized query arguments.
+    """
+    return method, path, normalize_query(query_args)
+
+
+class CassetteRecorder(object):
+    """
+    Appends the requests sent by a LinkedInJsonAPI to the cassette at
+    "path". Every entry is passed through "sanitize", when given, a function
+    taking and returning the entry dict, to remove data beyond tokens.
+    """
+
+    def __init__(self, path, sanitize=None):
+        self.path = path
+        self.sanitize = sanitize
+        self._file = None
+        self._lock = threading.Lock()
+
+    def record(self, method, url, query_args, body, resp, content, started,
+        duration):
+        entry = {
+            't': started,
+            'duration': round(duration, 6),
+            'method': method,
+            'path': urlparse.urlsplit(url).path,
+            'query': redact_value(dict(normalize_query(query_args))),
+            'body': redact(body) if body else body,
+            'status': resp.status,
+            'headers': dict((h, resp[h]) for h in HEADERS if h in resp),
+            'content': redact(content),
+        }
+        if self.sanitize is not None:
+            entry = self.sanitize(entry)
+        line = simplejson.dumps(entry, separators=(',', ':')) + '\n'
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a')
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class Cassette(object):
+    """
+    The entries of a recorded cassette, in recording order. match() returns
+    the recorded responses of a request in turn, cycling through them when
+    a request is replayed more often than it was recorded.
+    """
+
+    def __init__(self, path):
+        self.entries = []
+        with open(path) as cassette:
+            for line in cassette:
+                try:
+                    self.entries.append(simplejson.loads(line))
+                except ValueError:
+                    # a line cut short by a crash
+                    continue
+        grouped = {}
+        for entry in self.entries:
+            grouped.setdefault(normalize(
+                entry['method'], entry['path'], entry['query']), []
+            ).append(entry)
+        self._responses = dict(
+            (key, cycle(entries)) for key, entries in grouped.items())
+        self._lock = threading.Lock()
+
+    def match(self, method, path, query_args):
+        """
+        Return the next recorded entry for the request, or None.
+        """
+        responses = self._responses.get(normalize(method, path, query_args))
+        if responses is None:
+            return None
+        with self._lock:
+            return next(responses)
+
+    def replay(self, api, access_token, speed=1.0, max_workers=10,
+        methods=('GET',)):
+        """
+        Re-send the recorded requests with the given "methods" through api,
+        started at the recorded intervals divided by speed, and yield
+        (entry, future) pairs in completion order. Requests fall behind
+        schedule once max_workers are busy and twice as many are queued.
+        The recorded tokens are redacted, so every request is sent with
+        access_token.
+        """
+        token = api.get_user_token(access_token)
+        entries = [e for e in self.entries if e['method'] in methods]
+        if not entries:
+            return
+        first = entries[0]['t']
+        start = time.time()
+
+        def scheduled():
+            for entry in entries:
+                delay = start + (entry['t'] - first) / speed - time.time()
+                if 0 < delay:
+                    time.sleep(delay)
+                yield entry
+
+        def send(entry):
+            return api.request(
+                api.base_url + entry['path'], entry['query'], entry['method'],
+                body=entry['body'] or '', token=token)
+
+        for entry, future in imap_unordered(
+            send, scheduled(), max_workers=max_workers):
+            yield entry, future
+
+
+def replayed_response(entry):
+    """
+    Return the (response, content) of a recorded entry.
+    """
+    info = dict(entry['headers'])
+    info['status'] = str(entry['status'])
+    content = entry['content']
+    if isinstance(content, unicode):
+        content = content.encode('utf-8')
+    return httplib2.Response(info), content
+
+
+def replay_class(cassette, speed=1.0, api_class=LinkedInJsonAPI):
+    """
+    Return a subclass of api_class answering requests from cassette instead
+    of the network, after the recorded latency divided by speed. Requests
+    that were not recorded fail with a 404 error.
+    """
+    def _send(self, uri, method, body, headers, token, timeout=None,
+        event=None):
+        parsed = urlparse.urlsplit(uri)
+        entry = cassette.match(
+            method, parsed.path, dict(urlparse.parse_qsl(parsed.query)))
+        if entry is None:
+            return httplib2.Response({'status': '404'}), simplejson.dumps({
+                'errorCode': 0, 'status': 404,
+                'message': 'Not recorded: %s %s' % (method, parsed.path)})
+        time.sleep(entry['duration'] / speed)
+        return replayed_response(entry)
+
+    return type('Replay' + api_class.__name__, (api_class,), {'_send': _send})
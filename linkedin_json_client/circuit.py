@@ -0,0 +1,157 @@
+from collections import deque
+import threading
+import time
+
+from linkedin_json_client.errors import CircuitOpenError
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class Circuit(object):
+    """
+    The state of one endpoint: the outcomes of its last "window" calls, as
+    (failed, slow) pairs, while closed, and the probes sent while half-open.
+    """
+
+    def __init__(self, window):
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=window)
+        self.failures = 0
+        self.slow = 0
+        self.opened = None
+        self.probes = 0
+        self.successes = 0
+
+    def add(self, failed, slow):
+        if len(self.outcomes) == self.outcomes.maxlen:
+            old_failed, old_slow = self.outcomes[0]
+            self.failures -= old_failed
+            self.slow -= old_slow
+        self.outcomes.append((failed, slow))
+        self.failures += failed
+        self.slow += slow
+
+    def reset(self, state, now=None):
+        self.state = state
+        self.outcomes.clear()
+        self.failures = self.slow = 0
+        self.opened = now
+        self.probes = self.successes = 0
+
+    def snapshot(self):
+        return {
+            'state': self.state,
+            'calls': len(self.outcomes),
+            'failures': self.failures,
+            'slow': self.slow,
+            'opened': self.opened,
+        }
+
+
+class CircuitBreaker(object):
+    """
+    Fails calls fast while an endpoint is degraded. Every endpoint template
+    has its own circuit, which opens once at least "min_calls" of its last
+    "window" calls were made and either "error_rate" of them failed, with a
+    network error or a "failure_statuses" response, or "slow_call_rate" of
+    them took "slow_call_duration" seconds or more. While open, allow
+    raises a CircuitOpenError. After "reset_timeout" seconds the circuit is
+    half-open and lets "half_open_calls" probes through: it closes when
+    they all succeed, and opens again when one fails or is slow.
+    "on_state_change", when given, is called with the endpoint and its old
+    and new states after every change.
+    """
+
+    def __init__(self, error_rate=0.5, slow_call_duration=None,
+        slow_call_rate=0.5, window=20, min_calls=10, reset_timeout=30,
+        half_open_calls=1, failure_statuses=(500, 502, 503, 504),
+        on_state_change=None):
+        self.error_rate = error_rate
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate = slow_call_rate
+        self.window = window
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.failure_statuses = failure_statuses
+        self.on_state_change = on_state_change
+        self.circuits = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, endpoint):
+        circuit = self.circuits.get(endpoint)
+        if circuit is None:
+            circuit = self.circuits[endpoint] = Circuit(self.window)
+        return circuit
+
+    def _changed(self, endpoint, old, new):
+        if self.on_state_change is not None and old != new:
+            self.on_state_change(endpoint, old, new)
+
+    def allow(self, endpoint):
+        """
+        Raise a CircuitOpenError unless a call to endpoint may be sent.
+        """
+        circuit = self.circuits.get(endpoint)
+        if circuit is not None and CLOSED == circuit.state:
+            # the common case, without taking the lock
+            return
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            old = circuit.state
+            if CLOSED == old:
+                return
+            now = time.time()
+            if OPEN == old:
+                retry_after = circuit.opened + self.reset_timeout - now
+                if 0 < retry_after:
+                    raise CircuitOpenError(endpoint, retry_after)
+                circuit.reset(HALF_OPEN, circuit.opened)
+            if circuit.probes >= self.half_open_calls:
+                raise CircuitOpenError(endpoint, 0.0)
+            circuit.probes += 1
+            new = circuit.state
+        self._changed(endpoint, old, new)
+
+    def record(self, endpoint, status, duration):
+        """
+        Record the outcome of a call allowed to endpoint: the HTTP "status"
+        of its response, or None when it raised, and its "duration".
+        """
+        failed = status is None or status in self.failure_statuses
+        slow = (self.slow_call_duration is not None and
+                duration >= self.slow_call_duration)
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            old = circuit.state
+            if HALF_OPEN == old:
+                if failed or slow:
+                    circuit.reset(OPEN, time.time())
+                else:
+                    circuit.successes += 1
+                    if circuit.successes >= self.half_open_calls:
+                        circuit.reset(CLOSED)
+            elif CLOSED == old:
+                circuit.add(failed, slow)
+                calls = len(circuit.outcomes)
+                if calls >= self.min_calls and (
+                    circuit.failures >= self.error_rate * calls or
+                    circuit.slow >= self.slow_call_rate * calls):
+                    circuit.reset(OPEN, time.time())
+            new = circuit.state
+        self._changed(endpoint, old, new)
+
+    def state(self, endpoint):
+        with self._lock:
+            circuit = self.circuits.get(endpoint)
+            return circuit.state if circuit is not None else CLOSED
+
+    def snapshot(self):
+        """
+        Return the current state of every circuit.
+        """
+        with self._lock:
+            return dict((endpoint, circuit.snapshot())
+                        for endpoint, circuit in self.circuits.items())
@@ -0,0 +1,63 @@
+import threading
+
+
+class _Call(object):
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Merges concurrent identical calls: while a call for a key is in flight,
+    other callers with the same key wait for it and share its result or
+    error instead of making their own call.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._counters = {'executed': 0, 'coalesced': 0}
+
+    def do(self, key, fn):
+        """
+        Return fn(), or the result of the in-flight call for key.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._counters['executed'] += 1
+            else:
+                self._counters['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        """
+        "executed" counts the calls made, "coalesced" the calls that shared
+        the result of an in-flight call.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats['in_flight'] = len(self._calls)
+        return stats
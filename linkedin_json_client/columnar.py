@@ -0,0 +1,355 @@
+"""
+Converts people (profiles or connections) into columnar batches, one column
+per field of a selector projection such as
+    [BasicProfileSelectors.ID, BasicProfileSelectors.INDUSTRY,
+     BasicProfileSelectors.LOCATION_NAME, FullProfileSelectors.SKILLS]
+Nested selectors become dotted columns ('location:(name)' is
+'location.name'), listings and objects are stored as JSON text, and
+low-cardinality strings such as industry and location name are dictionary
+encoded. Batches are pyarrow RecordBatches, written to Parquet or Arrow IPC
+files, or, without pyarrow, NumPy structured arrays. Both libraries are
+optional and imported when first used.
+"""
+import importlib
+import re
+
+import simplejson
+
+from linkedin_json_client.records import Record, json_key
+
+# column kinds
+BOOLEAN = 'boolean'
+DICTIONARY = 'dictionary'
+INTEGER = 'integer'
+STRING = 'string'
+
+BOOLEAN_COLUMNS = frozenset(['num-connections-capped'])
+DICTIONARY_COLUMNS = frozenset([
+    'industry', 'location.country.code', 'location.name'])
+INTEGER_COLUMNS = frozenset([
+    'distance', 'last-modified-timestamp', 'num-connections',
+    'num-recommenders', 'relation-to-viewer.distance'])
+
+FORMATS = ('parquet', 'arrow', 'numpy')
+
+SELECTOR_TOKEN_RE = re.compile(r'[^:(),]+|:\(|\)|,')
+
+
+def _import(name):
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+def default_format():
+    """
+    'parquet' when pyarrow is installed, otherwise 'numpy'.
+    """
+    return 'parquet' if _import('pyarrow') is not None else 'numpy'
+
+
+def _selector_paths(selector):
+    """
+    The paths of the leaves of a selector, e.g. 'location:(name,country:
+    (code))' -> [['location', 'name'], ['location', 'country', 'code']].
+    """
+    tokens = SELECTOR_TOKEN_RE.findall(selector)
+    position = [0]
+
+    def parse(prefix):
+        paths = []
+        while position[0] < len(tokens):
+            token = tokens[position[0]]
+            position[0] += 1
+            if ',' == token:
+                continue
+            if ')' == token:
+                break
+            path = prefix + [token.strip()]
+            if (position[0] < len(tokens) and
+                ':(' == tokens[position[0]]):
+                position[0] += 1
+                paths.extend(parse(path))
+            else:
+                paths.append(path)
+        return paths
+    return parse([])
+
+
+class Column(object):
+    """
+    A column: its "name", the JSON keys of its "path" and its "kind".
+    """
+    __slots__ = ('name', 'path', 'kind')
+
+    def __init__(self, name, path, kind):
+        self.name = name
+        self.path = path
+        self.kind = kind
+
+    def value(self, person):
+        value = person
+        for key in self.path:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(key)
+        if value is None:
+            return None
+        if INTEGER == self.kind:
+            return int(value)
+        if BOOLEAN == self.kind:
+            return bool(value)
+        if isinstance(value, (dict, list)):
+            return simplejson.dumps(value, separators=(',', ':'))
+        return unicode(value)
+
+
+def columns_for(projection, dictionary_columns=DICTIONARY_COLUMNS):
+    """
+    Return the Columns of a list of selectors, once per field.
+    """
+    columns = []
+    names = set()
+    for selector in projection:
+        for path in _selector_paths(selector):
+            name = '.'.join(path)
+            if name in names:
+                continue
+            names.add(name)
+            if name in dictionary_columns:
+                kind = DICTIONARY
+            elif name in INTEGER_COLUMNS:
+                kind = INTEGER
+            elif name in BOOLEAN_COLUMNS:
+                kind = BOOLEAN
+            else:
+                kind = STRING
+            columns.append(Column(name, [json_key(p) for p in path], kind))
+    return columns
+
+
+class Dictionary(object):
+    """
+    Assigns each distinct value a code, in order of first appearance.
+    Codes never change, so batches encoded earlier stay valid as the
+    dictionary grows.
+    """
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def encode(self, value):
+        if value is None:
+            return None
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class ColumnarEncoder(object):
+    """
+    Encodes batches of people (dicts or Records) into columns, lists of
+    values keyed by column name, sharing one Dictionary per dictionary
+    column across batches. Dictionary columns hold codes.
+    """
+
+    def __init__(self, projection, dictionary_columns=DICTIONARY_COLUMNS):
+        self.columns = columns_for(projection, dictionary_columns)
+        self.dictionaries = dict(
+            (c.name, Dictionary()) for c in self.columns
+            if DICTIONARY == c.kind)
+
+    def encode(self, people):
+        people = [p.to_dict() if isinstance(p, Record) else p
+                  for p in people]
+        encoded = []
+        for column in self.columns:
+            values = [column.value(person) for person in people]
+            if DICTIONARY == column.kind:
+                encode = self.dictionaries[column.name].encode
+                values = [encode(value) for value in values]
+            encoded.append((column.name, values))
+        return encoded
+
+    def arrow_schema(self):
+        pa = importlib.import_module('pyarrow')
+        types = {
+            BOOLEAN: pa.bool_(),
+            DICTIONARY: pa.dictionary(pa.int32(), pa.string()),
+            INTEGER: pa.int64(),
+            STRING: pa.string(),
+        }
+        return pa.schema([
+            pa.field(c.name, types[c.kind]) for c in self.columns])
+
+    def to_arrow(self, encoded):
+        """
+        Return encoded columns as a pyarrow RecordBatch, whose dictionary
+        columns use the dictionaries as they are now.
+        """
+        pa = importlib.import_module('pyarrow')
+        schema = self.arrow_schema()
+        arrays = []
+        for field, (name, values) in zip(schema, encoded):
+            if name in self.dictionaries:
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    pa.array(values, type=pa.int32()),
+                    pa.array(self.dictionaries[name].values,
+                             type=pa.string())))
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema.names)
+
+    def to_numpy(self, encoded):
+        """
+        Return encoded columns as a NumPy structured array. Strings are
+        fixed-width unicode, dictionary columns hold int32 codes (-1 when
+        missing) into the "dictionaries", integers are float64 (NaN when
+        missing) and booleans are int8 (-1 when missing).
+        """
+        np = importlib.import_module('numpy')
+        kinds = dict((c.name, c.kind) for c in self.columns)
+        dtype = []
+        for name, values in encoded:
+            kind = kinds[name]
+            if DICTIONARY == kind:
+                dtype.append((name, 'i4'))
+            elif INTEGER == kind:
+                dtype.append((name, 'f8'))
+            elif BOOLEAN == kind:
+                dtype.append((name, 'i1'))
+            else:
+                width = max([len(v) for v in values if v is not None] + [1])
+                dtype.append((name, 'U%d' % width))
+        size = len(encoded[0][1]) if encoded else 0
+        array = np.zeros(size, dtype=dtype)
+        for name, values in encoded:
+            kind = kinds[name]
+            if INTEGER == kind:
+                missing = float('nan')
+            elif kind in (DICTIONARY, BOOLEAN):
+                missing = -1
+            else:
+                missing = u''
+            array[name] = [missing if v is None else v for v in values]
+        return array
+
+
+def to_arrow(people, projection, dictionary_columns=DICTIONARY_COLUMNS):
+    """
+    Convert people into a pyarrow RecordBatch.
+    """
+    encoder = ColumnarEncoder(projection, dictionary_columns)
+    return encoder.to_arrow(encoder.encode(people))
+
+
+def to_numpy(people, projection, dictionary_columns=DICTIONARY_COLUMNS):
+    """
+    Convert people into a NumPy structured array, and return it with a dict
+    of the values of every dictionary column, indexed by its codes.
+    """
+    encoder = ColumnarEncoder(projection, dictionary_columns)
+    array = encoder.to_numpy(encoder.encode(people))
+    return array, dict(
+        (name, d.values) for name, d in encoder.dictionaries.items())
+
+
+class ColumnarWriter(object):
+    """
+    Writes batches of people to "path" as 'parquet' (a row group per
+    batch), 'arrow' (an Arrow IPC file) or 'numpy' (an .npz file holding a
+    "data" structured array and a "dictionary:<column>" array per
+    dictionary column), by default the best format installed. Arrow and
+    NumPy files are written when the writer is closed, because their
+    dictionaries must be complete; the batches are buffered as columns
+    until then.
+    """
+
+    def __init__(self, path, projection, format=None,
+        dictionary_columns=DICTIONARY_COLUMNS):
+        self.path = path
+        self.format = format or default_format()
+        if self.format not in FORMATS:
+            raise ValueError('Unknown format "%s", use one of %s' % (
+                self.format, ', '.join(FORMATS)))
+        self.encoder = ColumnarEncoder(projection, dictionary_columns)
+        self.batches = []
+        self.rows = 0
+        self._parquet = None
+
+    def write(self, people):
+        encoded = self.encoder.encode(people)
+        self.rows += len(people)
+        if 'parquet' == self.format:
+            pa = importlib.import_module('pyarrow')
+            pq = importlib.import_module('pyarrow.parquet')
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(
+                    self.path, self.encoder.arrow_schema())
+            self._parquet.write_table(pa.Table.from_batches(
+                [self.encoder.to_arrow(encoded)]))
+        else:
+            self.batches.append(encoded)
+
+    def _merged(self):
+        merged = [(name, []) for name, values in self.batches[0]]
+        for batch in self.batches:
+            for (name, values), (merged_name, merged_values) in zip(
+                batch, merged):
+                merged_values.extend(values)
+        return merged
+
+    def close(self):
+        if 'parquet' == self.format:
+            if self._parquet is None:
+                self.write([])
+            self._parquet.close()
+        elif 'arrow' == self.format:
+            pa = importlib.import_module('pyarrow')
+            batches = [self.encoder.to_arrow(encoded) for encoded in (
+                self.batches or [self.encoder.encode([])])]
+            writer = pa.RecordBatchFileWriter(self.path, batches[0].schema)
+            for batch in batches:
+                writer.write_batch(batch)
+            writer.close()
+        else:
+            np = importlib.import_module('numpy')
+            merged = self._merged() if self.batches else (
+                self.encoder.encode([]))
+            arrays = {'data': self.encoder.to_numpy(merged)}
+            for name, dictionary in self.encoder.dictionaries.items():
+                arrays['dictionary:' + name] = np.array(
+                    dictionary.values, dtype=unicode)
+            with open(self.path, 'wb') as f:
+                np.savez(f, **arrays)
+        self.batches = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_connections(api, access_token, path, projection, format=None,
+    page_size=500, dictionary_columns=DICTIONARY_COLUMNS):
+    """
+    Write all connections of a member, fetched with the projection, to
+    path as a batch per page, and return the number of connections.
+    """
+    with ColumnarWriter(
+        path, projection, format, dictionary_columns) as writer:
+        batch = []
+        for person in api.iter_user_connections(
+            access_token, selectors=projection, page_size=page_size):
+            batch.append(person)
+            if len(batch) == page_size:
+                writer.write(batch)
+                batch = []
+        if batch:
+            writer.write(batch)
+    return writer.rows
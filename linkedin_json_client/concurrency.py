@@ -0,0 +1,39 @@
+from linkedin_json_client.lazy import LazyModule
+
+futures = LazyModule('concurrent.futures')
+
+
+def imap_unordered(fn, items, max_workers=10, max_pending=None):
+    """
+    Call fn(item) for every item on a bounded thread pool and yield
+    (item, future) pairs in completion order. At most "max_pending" calls
+    (default twice max_workers) are queued at once, so items may be a
+    lazy iterable of any length. Closing the generator cancels calls that
+    have not started yet.
+    """
+    max_pending = max_pending or max_workers * 2
+    items = iter(items)
+    pending = {}
+    executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[executor.submit(fn, item)] = item
+
+            if not pending:
+                break
+
+            done, not_done = futures.wait(
+                pending, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
@@ -1,6 +1,14 @@
 import re
 
 
+def to_selector(field):
+    """
+    Convert a camel-case field name into a '-' separated, lower-case
+    selector.
+    """
+    return re.sub(r'([A-Z])', '-\\1', field).lower()
+
+
 def convert_fields_to_selectors(selectors, fields):
     """
     Selectors need to convert camel-case names into '-' separated,
@@ -8,9 +16,32 @@ def convert_fields_to_selectors(selectors, fields):
     """
     for attr in dir(fields):
         if '__' != attr[:2]:
-            setattr(selectors, attr, re.sub(
-                r'([A-Z])', '-\\1', getattr(fields, attr)).lower())
-#            print getattr(selectors, attr)
+            setattr(selectors, attr, to_selector(getattr(fields, attr)))
+
+
+class SelectorsType(type):
+    """
+    The metaclass of the *Selectors classes. Each selector is converted
+    from the attribute of the same name of the class's "fields" when first
+    used, so importing this module does no conversion work.
+    """
+
+    def __getattr__(cls, attr):
+        if '__' == attr[:2] or 'fields' == attr:
+            raise AttributeError(attr)
+        try:
+            field = getattr(cls.fields, attr)
+        except AttributeError:
+            raise AttributeError(
+                "type object '%s' has no attribute '%s'" % (
+                    cls.__name__, attr))
+        selector = to_selector(field)
+        setattr(cls, attr, selector)
+        return selector
+
+    def __dir__(cls):
+        return sorted(set(dir(type(cls)) + list(vars(cls)) + [
+            attr for attr in dir(cls.fields) if '__' != attr[:2]]))
 
 
 class BasicProfileFields(object):
@@ -57,8 +88,8 @@ class BasicProfileSelectors(object):
     """
     The selectors to fetch BasicProfileFields.
     """
-    pass
-convert_fields_to_selectors(BasicProfileSelectors, BasicProfileFields)
+    __metaclass__ = SelectorsType
+    fields = BasicProfileFields
 
 
 class BoundAccountTypeFields(object):
@@ -115,8 +146,8 @@ class ConnectionSelectors(object):
     """
     The selectors to fetch ConnectionFields.
     """
-    pass
-convert_fields_to_selectors(ConnectionSelectors, ConnectionFields)
+    __metaclass__ = SelectorsType
+    fields = ConnectionFields
 
 
 class ContactInfoFields(object):
@@ -137,8 +168,8 @@ class ContactInfoSelectors(object):
     """
     The selectors to fetch ContactInfoFields.
     """
-    pass
-convert_fields_to_selectors(ContactInfoSelectors, ContactInfoFields)
+    __metaclass__ = SelectorsType
+    fields = ContactInfoFields
 
 
 class CourseFields(object):
@@ -166,8 +197,8 @@ class EmailSelectors(object):
     """
     The selectors to fetch EmailFields.
     """
-    pass
-convert_fields_to_selectors(EmailSelectors, EmailFields)
+    __metaclass__ = SelectorsType
+    fields = EmailFields
 
 
 class EducationFields(object):
@@ -222,8 +253,8 @@ class FullProfileSelectors(object):
     """
     The selectors to fetch FullProfileFields.
     """
-    pass
-convert_fields_to_selectors(FullProfileSelectors, FullProfileFields)
+    __metaclass__ = SelectorsType
+    fields = FullProfileFields
 
 
 class GroupMembershipFields(object):
@@ -259,8 +290,8 @@ class NetworkUpdateSelectors(object):
     """
     The selectors to fetch NetworkUpdateFields.
     """
-    pass
-convert_fields_to_selectors(NetworkUpdateSelectors, NetworkUpdateFields)
+    __metaclass__ = SelectorsType
+    fields = NetworkUpdateFields
 
 
 class PatentsFields(object):
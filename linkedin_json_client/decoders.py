@@ -0,0 +1,36 @@
+import importlib
+
+# JSON backends in order of preference, fastest first
+BACKENDS = ('ujson', 'simplejson', 'json')
+
+
+def available_backends():
+    """
+    Return the names of the installed JSON backends, fastest first.
+    """
+    names = []
+    for name in BACKENDS:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_decoder(backend=None):
+    """
+    Return a function decoding a JSON string. "backend" is either the name
+    of a module with a "loads" function (see BACKENDS), a decoding function,
+    or None to pick the fastest installed backend.
+    """
+    if callable(backend):
+        return backend
+    if backend is not None:
+        return importlib.import_module(backend).loads
+    # import the backends in turn, up to the first installed only
+    for name in BACKENDS:
+        try:
+            return importlib.import_module(name).loads
+        except ImportError:
+            continue
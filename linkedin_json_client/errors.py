@@ -1,4 +1,14 @@
+import time
+
+
 class LinkedInApiJsonClientError(ValueError):
+    defaults = {
+        'errorCode': 'unknown',
+        'message': '',
+        'status': 'unknown',
+        'timestamp': 'unknown',
+    }
+
     def __init__(self, error_json, *args, **kwargs):
         """
         JSON Errors look like
@@ -10,7 +20,29 @@ class LinkedInApiJsonClientError(ValueError):
           "timestamp": 1346269248747
         }
         """
+        self.error_json = dict(self.defaults)
+        self.error_json.update(error_json)
+        self.status = self.error_json['status']
         msg = 'LinkedIn request failed at %(timestamp)s with status '\
               '%(status)s. The error code was %(errorCode)s and message is '\
               '"%(message)s".'
-        super(LinkedInApiJsonClientError, self).__init__(msg % error_json)
\ No newline at end of file
+        super(LinkedInApiJsonClientError, self).__init__(
+            msg % self.error_json)
+
+
+class CircuitOpenError(LinkedInApiJsonClientError):
+    """
+    Raised instead of sending a request to an endpoint whose circuit is
+    open, after LinkedIn failed too many of its recent calls.
+    """
+
+    def __init__(self, endpoint, retry_after):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        super(CircuitOpenError, self).__init__({
+            'errorCode': 'circuit_open',
+            'message': 'The circuit of %s is open, retry in %.1f seconds' % (
+                endpoint, retry_after),
+            'status': 503,
+            'timestamp': int(time.time() * 1000),
+        })
@@ -0,0 +1,238 @@
+"""
+A local stand-in for the LinkedIn API, serving LinkedIn-shaped payloads for
+every endpoint used by LinkedInJsonAPI, with configurable latency, error
+rate and payload sizes, or responses replayed from a cassette. Requests must
+carry an OAuth signature, which is not verified.
+"""
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+import random
+import re
+from SocketServer import ThreadingMixIn
+import threading
+import time
+import urlparse
+
+import simplejson
+
+from linkedin_json_client import payloads
+from linkedin_json_client.api import LinkedInJsonAPI
+
+SELECTORS_RE = re.compile(r':\(.*\)$')
+
+
+def client_class(base_url, api_class=LinkedInJsonAPI):
+    """
+    Return a subclass of api_class sending every request to base_url
+    instead of api.linkedin.com.
+    """
+    attrs = {'base_url': base_url}
+    for name in dir(api_class):
+        value = getattr(api_class, name)
+        if (isinstance(value, basestring) and
+            (name.endswith('_url') or name.endswith('_path')) and
+            value.startswith(api_class.base_url)):
+            attrs[name] = base_url + value[len(api_class.base_url):]
+    return type('Fake' + api_class.__name__, (api_class,), attrs)
+
+
+class FakeLinkedInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # write each response in one packet, so Nagle's algorithm and delayed
+    # ACKs do not add 40ms to every request
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    # drop idle keep-alive connections
+    timeout = 60
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, content='', content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.send_header('x-li-request-id', '%010X' % random.getrandbits(40))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _send_json(self, status, data):
+        self._send(status, simplejson.dumps(data))
+
+    def _send_payload(self, factory, *args):
+        """
+        Send the JSON of factory(*args). Payloads are deterministic, so they
+        are encoded once and reused, keeping the server's cost out of the
+        client's measurements.
+        """
+        key = (factory,) + args
+        content = self.server.payloads.get(key)
+        if content is None:
+            content = self.server.payloads[key] = simplejson.dumps(
+                factory(*args))
+        self._send(200, content)
+
+    def _send_error(self, status, message):
+        self._send_json(status, {
+            'errorCode': 0, 'message': message, 'status': status,
+            'requestId': '%010X' % random.getrandbits(40),
+            'timestamp': int(time.time() * 1000)})
+
+    def _handle(self, method):
+        config = self.server.config
+        parsed = urlparse.urlsplit(self.path)
+        path = SELECTORS_RE.sub('', parsed.path)
+        query = dict(urlparse.parse_qsl(parsed.query))
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        if config['latency']:
+            time.sleep(random.uniform(
+                config['latency'], config['latency'] + config['jitter']))
+        if 'oauth_signature' not in (
+            parsed.query + body + self.headers.get('Authorization', '')):
+            return self._send(401, 'oauth_problem=signature_missing',
+                              'application/x-www-form-urlencoded')
+        if random.random() < config['error_rate']:
+            return self._send_error(503, 'Service unavailable')
+
+        if self.server.cassette is not None:
+            entry = self.server.cassette.match(method, parsed.path, query)
+            if entry is not None:
+                time.sleep(entry['duration'] / self.server.speed)
+                content = entry['content']
+                if isinstance(content, unicode):
+                    content = content.encode('utf-8')
+                return self._send(entry['status'], content, entry[
+                    'headers'].get('content-type', 'application/json'))
+
+        route = self.server.routes.get((method, path))
+        if route is None and path.endswith('/update-comments'):
+            route = self.server.routes.get((method, 'update-comments'))
+        if route is None:
+            return self._send_error(404, 'Unknown resource %s' % path)
+        route(self, query, body)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    # endpoints
+
+    def get_profile(self, query, body):
+        self._send_payload(payloads.person, 0, self.server.config['full'])
+
+    def get_connections(self, query, body):
+        config = self.server.config
+        self._send_payload(
+            payloads.connections_page, int(query.get('start', 0)),
+            min(int(query.get('count', 500)), 500),
+            config['connections'], config['full'])
+
+    def get_network_updates(self, query, body):
+        config = self.server.config
+        self._send_payload(
+            payloads.network_updates, int(query.get('start', 0)),
+            min(int(query.get('count', 250)), 250), config['updates'])
+
+    def get_comment_feed(self, query, body):
+        self._send_json(200, {'_total': 2, 'values': [{
+            'comment': u'Congratulations!', 'id': i,
+            'person': payloads.person(i), 'sequenceNumber': i,
+            'timestamp': int(time.time() * 1000)} for i in range(2)]})
+
+    def get_email_address(self, query, body):
+        self._send_json(200, 'jsmith@example.com')
+
+    def post_created(self, query, body):
+        self._send(201)
+
+    def post_share(self, query, body):
+        self._send_json(201, {
+            'updateKey': 'UNIU-1-%s-SHARE' % random.getrandbits(32),
+            'updateUrl': 'http://www.linkedin.com/updates'})
+
+    def put_status(self, query, body):
+        self._send(204)
+
+    def post_request_token(self, query, body):
+        self._send(200, 'oauth_token=%s&oauth_token_secret=%s'
+                   '&oauth_callback_confirmed=true&oauth_expires_in=599' % (
+                       random.getrandbits(64), random.getrandbits(64)),
+                   'application/x-www-form-urlencoded')
+
+    def post_access_token(self, query, body):
+        self._send(200, 'oauth_token=%s&oauth_token_secret=%s'
+                   '&oauth_expires_in=5183999'
+                   '&oauth_authorization_expires_in=5183999' % (
+                       random.getrandbits(64), random.getrandbits(64)),
+                   'application/x-www-form-urlencoded')
+
+
+class FakeLinkedInServer(ThreadingMixIn, HTTPServer):
+    """
+    Serve the fake API from a background thread, e.g.
+        with FakeLinkedInServer(latency=0.05, error_rate=0.01) as server:
+            api = client_class(server.base_url)(key, secret)
+        latency - minimum seconds before a response, plus up to "jitter"
+        error_rate - the fraction of requests answered with a 503
+        connections - the number of connections of the member
+        updates - the number of network updates of the member
+        full - include full profile sections in profiles
+        cassette - a Cassette whose recorded responses are served, after
+            the recorded latency divided by "speed", for the requests it
+            recorded
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0,
+        error_rate=0.0, connections=500, updates=250, full=False,
+        cassette=None, speed=1.0):
+        HTTPServer.__init__(self, (host, port), FakeLinkedInHandler)
+        self.config = {
+            'latency': latency, 'jitter': jitter, 'error_rate': error_rate,
+            'connections': connections, 'updates': updates, 'full': full}
+        h = FakeLinkedInHandler
+        self.routes = {
+            ('GET', '/v1/people/~'): h.get_profile,
+            ('GET', '/v1/people/~/connections'): h.get_connections,
+            ('GET', '/v1/people/~/email-address'): h.get_email_address,
+            ('GET', '/v1/people/~/network'): h.get_network_updates,
+            ('GET', '/v1/people/~/network/updates'): h.get_network_updates,
+            ('GET', 'update-comments'): h.get_comment_feed,
+            ('POST', 'update-comments'): h.post_created,
+            ('POST', '/v1/people/~/mailbox'): h.post_created,
+            ('POST', '/v1/people/~/shares'): h.post_share,
+            ('PUT', '/v1/people/~/current-status'): h.put_status,
+            ('POST', '/uas/oauth/requestToken'): h.post_request_token,
+            ('POST', '/uas/oauth/accessToken'): h.post_access_token,
+        }
+        self.cassette = cassette
+        self.speed = speed
+        self.payloads = {}
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return 'http://%s:%s' % self.server_address[:2]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
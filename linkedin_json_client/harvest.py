@@ -0,0 +1,258 @@
+"""
+Harvests the profiles, connections and network updates of many members on
+a pool of processes, e.g.
+    python -m linkedin_json_client.harvest tokens.txt out/ \\
+        --consumer-key KEY --consumer-secret SECRET --processes 8
+
+The token file has one member per line, either as JSON with "oauth_token",
+"oauth_token_secret" and an optional "id", or as the query string returned
+by get_access_token. Results are written to "shards" NDJSON files in the
+output directory, one line per profile, connection or update:
+    {"member": ..., "kind": "profile", "data": {...}}
+Members are identified by their "id", or by a hash of their token, so
+tokens are never written out. Every finished member is appended to a
+checkpoint file and skipped when the harvest is run again, so a killed run
+resumes where it stopped. Members whose calls fail are reported to
+errors.ndjson and retried by the next run, as are malformed lines of the
+token file, by line number. Network updates are paged
+through in full, and the newest update harvested for every member is kept
+in watermarks.db, so a member harvested again, e.g. into a new output
+directory sharing it, only gets the updates posted since.
+"""
+import argparse
+from hashlib import sha1
+import multiprocessing
+import os
+import sys
+import threading
+import urlparse
+import zlib
+
+import simplejson
+
+from linkedin_json_client.api import LinkedInJsonAPI
+from linkedin_json_client.retry import RetryPolicy
+from linkedin_json_client.sync import MemoryWatermarkStore
+from linkedin_json_client.sync import NetworkUpdateSync
+from linkedin_json_client.sync import SQLiteWatermarkStore
+
+KINDS = ('profile', 'connections', 'updates')
+CHECKPOINT = 'checkpoint.txt'
+ERRORS = 'errors.ndjson'
+WATERMARKS = 'watermarks.db'
+
+# the API of a worker process
+_api = None
+
+
+def parse_token(line):
+    """
+    Return (member key, access token dict) for a line of the token file,
+    or None for blank lines and comments. Raise a ValueError, which never
+    includes the line, when it is not a token.
+    """
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    if line.startswith('{'):
+        try:
+            token = simplejson.loads(line)
+        except ValueError:
+            raise ValueError('invalid JSON')
+        if not isinstance(token, dict):
+            raise ValueError('not a JSON object')
+    else:
+        token = dict(urlparse.parse_qsl(line))
+    for key in ('oauth_token', 'oauth_token_secret'):
+        if not isinstance(token.get(key), basestring) or not token[key]:
+            raise ValueError('no %s' % key)
+    member = token.get('id')
+    if not member:
+        oauth_token = token['oauth_token']
+        if isinstance(oauth_token, unicode):
+            oauth_token = oauth_token.encode('utf-8')
+        member = sha1(oauth_token).hexdigest()[:16]
+    if isinstance(member, unicode):
+        member = member.encode('utf-8')
+    return str(member), token
+
+
+def read_checkpoint(path):
+    done = set()
+    if os.path.exists(path):
+        with open(path) as checkpoint:
+            for line in checkpoint:
+                if line.endswith('\n'):
+                    done.add(line[:-1])
+    return done
+
+
+def _init_worker(consumer_key, consumer_secret, base_url, api_kwargs):
+    global _api
+    api_class = LinkedInJsonAPI
+    if base_url:
+        from linkedin_json_client.fakeserver import client_class
+        api_class = client_class(base_url)
+    _api = api_class(consumer_key, consumer_secret, **api_kwargs)
+
+
+def _harvest_member(args):
+    """
+    Fetch the data of one member and return (member, NDJSON lines, error,
+    watermark). Lines are encoded in the worker, so the parent only writes
+    them. Only the updates newer than the given watermark are fetched, and
+    the returned one is stored by the parent once the lines are written.
+    """
+    member, token, kinds, mark = args
+
+    def line(kind, data):
+        return simplejson.dumps(
+            {'member': member, 'kind': kind, 'data': data},
+            separators=(',', ':')) + '\n'
+
+    lines = []
+    try:
+        if 'profile' in kinds:
+            lines.append(line('profile', _api.get_user_profile(token)))
+        if 'connections' in kinds:
+            for person in _api.iter_user_connections(token):
+                lines.append(line('connection', person))
+        if 'updates' in kinds:
+            store = MemoryWatermarkStore()
+            if mark[0] is not None:
+                store.advance(member, *mark)
+            for update in NetworkUpdateSync(_api, store).sync(member, token):
+                lines.append(line('update', update))
+            mark = store.get(member)
+    except Exception as e:
+        return member, None, '%s: %s' % (type(e).__name__, e), None
+    return member, ''.join(lines), None, mark
+
+
+def _completed(results):
+    """
+    Yield the results of an imap, waiting with a timeout, without which a
+    KeyboardInterrupt is not delivered until the next result arrives.
+    """
+    while True:
+        try:
+            yield results.next(1)
+        except multiprocessing.TimeoutError:
+            continue
+        except StopIteration:
+            return
+
+
+def harvest(token_path, output_dir, consumer_key, consumer_secret,
+    processes=4, shards=8, kinds=KINDS, base_url=None, api_kwargs=None):
+    """
+    Harvest every member of the token file that is not checkpointed yet,
+    and return counts of the members 'done', 'failed' and 'skipped'.
+    """
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    checkpoint_path = os.path.join(output_dir, CHECKPOINT)
+    done = read_checkpoint(checkpoint_path)
+    watermarks = SQLiteWatermarkStore(os.path.join(output_dir, WATERMARKS))
+    counts = {'done': 0, 'failed': 0, 'skipped': 0}
+    # the pool reads pending() on a thread of its own
+    errors_lock = threading.Lock()
+
+    def report(error):
+        with errors_lock:
+            errors.write(simplejson.dumps(error) + '\n')
+            errors.flush()
+            counts['failed'] += 1
+
+    def pending():
+        with open(token_path) as tokens:
+            for number, line in enumerate(tokens, 1):
+                try:
+                    parsed = parse_token(line)
+                except ValueError as e:
+                    report({'line': number, 'error': 'ValueError: %s' % e})
+                    continue
+                if parsed is None:
+                    continue
+                if parsed[0] in done:
+                    counts['skipped'] += 1
+                    continue
+                yield parsed + (kinds, watermarks.get(parsed[0]))
+
+    outputs = [open(os.path.join(output_dir, 'harvest-%05d.ndjson' % i), 'a')
+               for i in range(shards)]
+    checkpoint = open(checkpoint_path, 'a')
+    errors = open(os.path.join(output_dir, ERRORS), 'a')
+    pool = multiprocessing.Pool(
+        processes, _init_worker,
+        (consumer_key, consumer_secret, base_url, api_kwargs or {}))
+    try:
+        for member, lines, error, mark in _completed(pool.imap_unordered(
+            _harvest_member, pending())):
+            if error is not None:
+                report({'member': member, 'error': error})
+                continue
+            output = outputs[zlib.crc32(member) % shards]
+            output.write(lines)
+            output.flush()
+            # only advance the watermark and checkpoint members whose output
+            # is written, so a crash repeats a member rather than losing it
+            if mark[0] is not None:
+                watermarks.advance(member, *mark)
+            checkpoint.write(member + '\n')
+            checkpoint.flush()
+            done.add(member)
+            counts['done'] += 1
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        for f in outputs + [checkpoint, errors]:
+            f.close()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Harvest LinkedIn member data into sharded NDJSON files.')
+    parser.add_argument('tokens', help='the token file')
+    parser.add_argument('output_dir')
+    parser.add_argument(
+        '--consumer-key', default=os.environ.get('LINKEDIN_CONSUMER_KEY'))
+    parser.add_argument(
+        '--consumer-secret',
+        default=os.environ.get('LINKEDIN_CONSUMER_SECRET'))
+    parser.add_argument('--processes', type=int,
+                        default=multiprocessing.cpu_count())
+    parser.add_argument('--shards', type=int, default=8)
+    parser.add_argument('--kinds', default=','.join(KINDS),
+                        help='what to harvest (default: %(default)s)')
+    parser.add_argument('--retries', type=int, default=3,
+                        help='attempts per call (default: %(default)s)')
+    parser.add_argument('--base-url',
+                        help='send requests to this server instead')
+    args = parser.parse_args(argv)
+    if not args.consumer_key or not args.consumer_secret:
+        parser.error('--consumer-key and --consumer-secret, or the '
+                     'LINKEDIN_CONSUMER_KEY and LINKEDIN_CONSUMER_SECRET '
+                     'environment variables, are required')
+    kinds = tuple(args.kinds.split(','))
+    unknown = set(kinds) - set(KINDS)
+    if unknown:
+        parser.error('unknown kinds: %s' % ', '.join(sorted(unknown)))
+
+    counts = harvest(
+        args.tokens, args.output_dir, args.consumer_key,
+        args.consumer_secret, processes=args.processes, shards=args.shards,
+        kinds=kinds, base_url=args.base_url, api_kwargs={
+            'fast_signing': True,
+            'retry_policy': RetryPolicy(max_attempts=args.retries)})
+    sys.stderr.write('%(done)d done, %(failed)d failed, '
+                     '%(skipped)d already harvested\n' % counts)
+    return 1 if counts['failed'] else 0
+
+
+if '__main__' == __name__:
+    sys.exit(main())
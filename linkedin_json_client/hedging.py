@@ -0,0 +1,95 @@
+import threading
+
+from linkedin_json_client.instrumentation import Histogram
+
+# seconds, 1ms to about 12s in steps of 25%
+HEDGE_BUCKETS = tuple(0.001 * 1.25 ** i for i in range(43))
+
+
+class HedgePolicy(object):
+    """
+    When to send a duplicate of a slow GET. A hedge is sent once the first
+    attempt has taken longer than the "percentile" latency of its endpoint,
+    estimated from the last "window" to 2 * "window" first attempts, and
+    never sooner than "min_delay". Until "min_samples" latencies are known,
+    "initial_delay" is used, and no hedge is sent when it is None. Hedges
+    are limited to "max_extra" times the number of GETs, so a slow LinkedIn
+    is never sent more than that much extra load. Requests are sent on a
+    pool of "max_workers" threads shared by all calls.
+    """
+
+    def __init__(self, percentile=95, min_delay=0.005, initial_delay=None,
+        min_samples=20, max_extra=0.05, window=1000, max_workers=64,
+        buckets=HEDGE_BUCKETS):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.max_extra = max_extra
+        self.window = window
+        self.max_workers = max_workers
+        self.buckets = buckets
+        # endpoint -> [current, previous] latency histograms
+        self.latencies = {}
+        self._counters = {
+            'requests': 0,
+            'fired': 0,
+            'won': 0,
+            'denied': 0,
+        }
+        self._lock = threading.Lock()
+
+    def _histograms(self, endpoint):
+        histograms = self.latencies.get(endpoint)
+        if histograms is None:
+            with self._lock:
+                histograms = self.latencies.setdefault(
+                    endpoint, [Histogram(self.buckets), None])
+        return histograms
+
+    def observe(self, endpoint, duration):
+        """
+        Record the latency of a first attempt to endpoint.
+        """
+        histograms = self._histograms(endpoint)
+        histogram = histograms[0]
+        histogram.observe(duration)
+        if histogram.count >= self.window:
+            with self._lock:
+                if histograms[0] is histogram:
+                    histograms[:] = [Histogram(self.buckets), histogram]
+
+    def delay(self, endpoint):
+        """
+        Return the seconds to wait for a first attempt to endpoint before
+        hedging it, or None to never hedge it. Counts a request.
+        """
+        with self._lock:
+            self._counters['requests'] += 1
+        current, previous = self._histograms(endpoint)
+        histogram = current
+        if current.count < self.min_samples and previous is not None:
+            histogram = previous
+        if histogram.count < self.min_samples:
+            return self.initial_delay
+        return max(self.min_delay, histogram.percentile(self.percentile))
+
+    def fire(self):
+        """
+        Return True, counting a hedge, when the extra load allows one.
+        """
+        with self._lock:
+            counters = self._counters
+            if counters['fired'] >= self.max_extra * counters['requests']:
+                counters['denied'] += 1
+                return False
+            counters['fired'] += 1
+            return True
+
+    def won(self):
+        with self._lock:
+            self._counters['won'] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters)
@@ -0,0 +1,260 @@
+"""
+Per-request instrumentation. Observers attached to a LinkedInJsonAPI are
+called with a RequestEvent after every call it makes, e.g.
+    metrics = MetricsObserver()
+    api = LinkedInJsonAPI(key, secret, observers=[metrics])
+    ...
+    print metrics.to_prometheus()
+"""
+from bisect import bisect_left
+import re
+import socket
+import threading
+import urlparse
+
+# seconds
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+SELECTORS_RE = re.compile(r':\(.*\)')
+IDENTIFIER_RE = re.compile(r'\b(key|id|email|url)=[^/:]+')
+
+_templates = {}
+
+
+def endpoint_template(url):
+    """
+    The path of url with identifiers and field selectors replaced by
+    placeholders, e.g. '/v1/people/id={id}:(...)', so that calls to the same
+    endpoint share their metrics.
+    """
+    template = _templates.get(url)
+    if template is None:
+        template = urlparse.urlsplit(url).path
+        template = SELECTORS_RE.sub(':(...)', template)
+        template = IDENTIFIER_RE.sub(r'\1={\1}', template)
+        if len(_templates) < 1000:
+            _templates[url] = template
+    return template
+
+
+class RequestEvent(object):
+    """
+    Describes one call of LinkedInJsonAPI.request.
+        endpoint - the endpoint_template of the URL
+        method - the HTTP method
+        source - 'network', or 'cache' and 'coalesced' for GETs answered by
+            the response cache or by a concurrent identical call
+        status - the HTTP status of the last attempt, None when no response
+            was received
+        bytes - the length of the response content
+        request_id - the x-li-request-id header, for LinkedIn support
+        retries - the number of attempts after the first
+        duration - the seconds spent in the call, including waits
+        sign_time, network_time, decode_time - the seconds spent signing,
+            sending and decoding the request, over all attempts. Signing is
+            only timed separately with fast_signing, otherwise it is part of
+            network_time.
+        error - the exception raised by the call, or None
+    """
+    __slots__ = (
+        'endpoint', 'method', 'source', 'status', 'bytes', 'request_id',
+        'retries', 'duration', 'sign_time', 'network_time', 'decode_time',
+        'error')
+
+    def __init__(self, endpoint, method):
+        self.endpoint = endpoint
+        self.method = method
+        self.source = 'network'
+        self.status = None
+        self.bytes = 0
+        self.request_id = None
+        self.retries = 0
+        self.duration = 0.0
+        self.sign_time = 0.0
+        self.network_time = 0.0
+        self.decode_time = 0.0
+        self.error = None
+
+    def __repr__(self):
+        return '<RequestEvent %s>' % ', '.join(
+            '%s=%r' % (name, getattr(self, name)) for name in self.__slots__)
+
+
+class Histogram(object):
+    """
+    A thread-safe histogram counting values into cumulative "buckets" (upper
+    bounds, in increasing order).
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def cumulative(self):
+        """
+        Return (upper bound, count of values <= bound) pairs, ending with
+        an infinite bound counting every value.
+        """
+        with self._lock:
+            counts = list(self.counts)
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def percentile(self, p):
+        """
+        Estimate the p-th percentile by interpolating within its bucket, or
+        return None when nothing was observed. Values beyond the last bucket
+        are reported as its bound.
+        """
+        pairs = self.cumulative()
+        total = pairs[-1][1]
+        if not total:
+            return None
+        rank = p / 100.0 * total
+        lower, below = 0.0, 0
+        for bound, count in pairs:
+            if count >= rank:
+                if bound == float('inf'):
+                    return lower
+                if count == below:
+                    return bound
+                return lower + (bound - lower) * (rank - below) / (
+                    count - below)
+            lower, below = bound, count
+
+
+def _labels(**labels):
+    return '{%s}' % ','.join(
+        '%s="%s"' % (name, unicode(value).replace('\\', '\\\\')
+                     .replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in sorted(labels.items()))
+
+
+class MetricsObserver(object):
+    """
+    Aggregates events into per-endpoint latency histograms and counters of
+    requests (by status), response bytes, retries and time per phase, and
+    exports them in the Prometheus text format.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.latencies = {}
+        self.requests = {}
+        self.bytes = {}
+        self.retries = {}
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        key = (event.endpoint, event.method)
+        status = event.status or ('error' if event.error else event.source)
+        with self._lock:
+            histogram = self.latencies.get(key)
+            if histogram is None:
+                histogram = self.latencies[key] = Histogram(self.buckets)
+            request_key = key + (status,)
+            self.requests[request_key] = self.requests.get(request_key, 0) + 1
+            self.bytes[key] = self.bytes.get(key, 0) + event.bytes
+            self.retries[key] = self.retries.get(key, 0) + event.retries
+            for phase in ('sign', 'network', 'decode'):
+                phase_key = key + (phase,)
+                self.phases[phase_key] = (self.phases.get(phase_key, 0.0) +
+                                          getattr(event, phase + '_time'))
+        histogram.observe(event.duration)
+
+    def histogram(self, endpoint, method='GET'):
+        """
+        Return the latency Histogram of an endpoint template, or None.
+        """
+        return self.latencies.get((endpoint, method))
+
+    def to_prometheus(self, prefix='linkedin_api'):
+        """
+        Return the metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            latencies = sorted(self.latencies.items())
+            counters = [
+                ('requests_total', 'Requests by response status.', 'status',
+                 sorted(self.requests.items())),
+                ('response_bytes_total', 'Bytes of response content.', None,
+                 sorted(self.bytes.items())),
+                ('retries_total', 'Attempts after the first.', None,
+                 sorted(self.retries.items())),
+                ('phase_seconds_total', 'Seconds spent per phase.', 'phase',
+                 sorted(self.phases.items())),
+            ]
+
+        name = prefix + '_request_duration_seconds'
+        lines = ['# HELP %s Request latency.' % name,
+                 '# TYPE %s histogram' % name]
+        for (endpoint, method), histogram in latencies:
+            for bound, count in histogram.cumulative():
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append('%s_bucket%s %d' % (name, _labels(
+                    endpoint=endpoint, method=method, le=le), count))
+            labels = _labels(endpoint=endpoint, method=method)
+            lines.append('%s_sum%s %r' % (name, labels, histogram.sum))
+            lines.append('%s_count%s %d' % (name, labels, histogram.count))
+
+        for suffix, help, label, items in counters:
+            name = '%s_%s' % (prefix, suffix)
+            lines.append('# HELP %s %s' % (name, help))
+            lines.append('# TYPE %s counter' % name)
+            for key, value in items:
+                labels = {'endpoint': key[0], 'method': key[1]}
+                if label:
+                    labels[label] = key[2]
+                lines.append('%s%s %r' % (name, _labels(**labels), value))
+        return '\n'.join(lines) + '\n'
+
+
+class StatsdObserver(object):
+    """
+    Sends every event to a StatsD server over UDP as a request counter, a
+    latency timer and a response bytes counter, named like
+    "linkedin_api.v1_people_connections.GET.200.count". Send errors are
+    ignored, so a missing StatsD server never fails API calls.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix='linkedin_api'):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._names = {}
+
+    def metric_name(self, endpoint):
+        name = self._names.get(endpoint)
+        if name is None:
+            name = self._names[endpoint] = re.sub(
+                r'[^a-zA-Z0-9]+', '_', endpoint).strip('_')
+        return name
+
+    def __call__(self, event):
+        name = '%s.%s.%s' % (
+            self.prefix, self.metric_name(event.endpoint), event.method)
+        status = event.status or ('error' if event.error else event.source)
+        packet = '\n'.join([
+            '%s.%s.count:1|c' % (name, status),
+            '%s.duration:%d|ms' % (name, event.duration * 1000),
+            '%s.bytes:%d|c' % (name, event.bytes),
+        ])
+        try:
+            self.socket.sendto(packet, self.address)
+        except socket.error:
+            pass
@@ -0,0 +1,58 @@
+import importlib
+import threading
+
+
+class LazyModule(object):
+    """
+    Stands in for the module "name", which is only imported when one of its
+    attributes is first used, keeping slow imports out of the start-up of
+    programs that never send a request. Setting and deleting attributes
+    is forwarded to the module, so mock.patch works through the proxy.
+    """
+
+    def __init__(self, name):
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_module', None)
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            module = importlib.import_module(self._name)
+            object.__setattr__(self, '_module', module)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __delattr__(self, attr):
+        delattr(self._load(), attr)
+
+    def __repr__(self):
+        return '<lazy module %r>' % self._name
+
+
+class lazy_attribute(object):
+    """
+    Decorates a method computing an attribute when it is first read, e.g. a
+    client's OAuth consumer, whose class lives in a slow module. The value
+    is then stored on the instance, which shadows the decorator, so later
+    reads cost nothing. It is computed once, even by concurrent readers.
+    """
+
+    def __init__(self, build):
+        self.build = build
+        self.name = build.__name__
+        self.__doc__ = build.__doc__
+        self._lock = threading.RLock()
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        with self._lock:
+            value = instance.__dict__.get(self.name, self)
+            if value is self:
+                value = instance.__dict__[self.name] = self.build(instance)
+        return value
@@ -0,0 +1,139 @@
+"""
+Load tests the client against the fake LinkedIn API server, reporting the
+throughput and latency percentiles of every client method. Run with
+    python -m linkedin_json_client.loadtest --requests 500 --latency 0.02
+"""
+import argparse
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from linkedin_json_client.fakeserver import FakeLinkedInServer, client_class
+
+ACCESS_TOKEN = {
+    'oauth_token': 'fake-token', 'oauth_token_secret': 'fake-secret'}
+
+# method name -> call made with (api, access token)
+METHODS = {
+    'get_comment_feed': lambda api, token: api.get_comment_feed(
+        token, 'UNIU-1-12345-SHARE'),
+    'get_email_address': lambda api, token: api.get_email_address(token),
+    'get_network_updates': lambda api, token: api.get_network_updates(
+        token, count=250),
+    'get_request_token': lambda api, token: api.get_request_token(),
+    'get_user_connections': lambda api, token: api.get_user_connections(
+        token, query_args={'count': 500}),
+    'get_user_profile': lambda api, token: api.get_user_profile(token),
+    'send_message': lambda api, token: api.send_message(
+        token, ['Id00000001'], 'Subject', 'Body'),
+    'set_status_update': lambda api, token: api.set_status_update(
+        token, 'Load testing'),
+    'share': lambda api, token: api.share(
+        token, 'Load testing', 'Title', 'Description'),
+    'submit_comment': lambda api, token: api.submit_comment(
+        token, 'UNIU-1-12345-SHARE', 'Nice'),
+}
+
+
+def percentile(values, p):
+    """
+    The nearest-rank p-th percentile of the sorted list values.
+    """
+    if not values:
+        return None
+    rank = max(int(round(p / 100.0 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def run_method(api, access_token, call, requests=200, concurrency=10):
+    """
+    Make "requests" calls with "concurrency" threads and return a dict of
+    the requests per second, error count and p50/p95/p99 latencies in
+    seconds.
+    """
+    def timed(i):
+        start = time.time()
+        try:
+            call(api, access_token)
+        except Exception:
+            return time.time() - start, False
+        return time.time() - start, True
+
+    executor = ThreadPoolExecutor(concurrency)
+    start = time.time()
+    try:
+        results = list(executor.map(timed, xrange(requests)))
+    finally:
+        executor.shutdown()
+    elapsed = time.time() - start
+
+    latencies = sorted(latency for latency, ok in results)
+    return {
+        'requests': requests,
+        'errors': sum(1 for latency, ok in results if not ok),
+        'rps': requests / elapsed if elapsed else float('inf'),
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+    }
+
+
+def run(api, access_token=ACCESS_TOKEN, methods=None, requests=200,
+    concurrency=10):
+    """
+    Load test each of the named methods (all of METHODS by default) in
+    turn and return a dict of method name to run_method results.
+    """
+    return dict(
+        (name, run_method(api, access_token, METHODS[name], requests,
+                          concurrency))
+        for name in (methods or sorted(METHODS)))
+
+
+def format_report(results):
+    lines = ['%-22s %8s %7s %9s %9s %9s' % (
+        'method', 'req/s', 'errors', 'p50 ms', 'p95 ms', 'p99 ms')]
+    for name, result in sorted(results.items()):
+        lines.append('%-22s %8.1f %7d %9.2f %9.2f %9.2f' % (
+            name, result['rps'], result['errors'], result['p50'] * 1000,
+            result['p95'] * 1000, result['p99'] * 1000))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('methods', nargs='*', metavar='method',
+                        help='the client methods to test (default: all of '
+                             '%s)' % ', '.join(sorted(METHODS)))
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='minimum server latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='random extra server latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--connections', type=int, default=500)
+    parser.add_argument('--updates', type=int, default=250)
+    parser.add_argument('--full', action='store_true',
+                        help='serve full profiles')
+    parser.add_argument('--fast-signing', action='store_true')
+    args = parser.parse_args(argv)
+    unknown = set(args.methods) - set(METHODS)
+    if unknown:
+        parser.error('unknown methods: %s' % ', '.join(sorted(unknown)))
+
+    with FakeLinkedInServer(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        connections=args.connections, updates=args.updates,
+        full=args.full) as server:
+        api = client_class(server.base_url)(
+            'fake-key', 'fake-secret', pool_size=args.concurrency,
+            fast_signing=args.fast_signing)
+        results = run(api, methods=args.methods, requests=args.requests,
+                      concurrency=args.concurrency)
+        api.pool.clear()
+    print format_report(results)
+
+
+if '__main__' == __name__:
+    main()
@@ -0,0 +1,111 @@
+"""
+Deterministic LinkedIn-shaped JSON payloads, modelled on responses recorded
+from the API, for benchmarks and load tests.
+"""
+import random
+
+FIRST_NAMES = [u'John', u'Jane', u'Ren\xe9e', u'Zo\xeb', u'Matt', u'Priya']
+LAST_NAMES = [u'Smith', u'Snider', u'M\xfcller', u'Nakamura', u'Okafor']
+INDUSTRIES = [u'Internet', u'Computer Software', u'Financial Services',
+              u'Marketing and Advertising', u'Higher Education']
+LOCATIONS = [(u'San Francisco Bay Area', u'us'), (u'Greater New York City '
+             u'Area', u'us'), (u'London, United Kingdom', u'gb'),
+             (u'Bengaluru Area, India', u'in')]
+UPDATE_TYPES = ['CONN', 'PRFU', 'STAT', 'SHAR', 'JGRP', 'PICU']
+
+
+def _date(rnd):
+    return {'year': rnd.randint(1995, 2012), 'month': rnd.randint(1, 12)}
+
+
+def _listing(values):
+    return {'_total': len(values), 'values': values}
+
+
+def person(i, full=False):
+    """
+    The profile of person number i, with the basic profile fields and,
+    when full is True, positions, educations and skills.
+    """
+    rnd = random.Random(i)
+    member_id = 'Id%08d' % i
+    location_name, country = rnd.choice(LOCATIONS)
+    profile = {
+        'apiStandardProfileRequest': {
+            'headers': _listing([{
+                'name': 'x-li-auth-token',
+                'value': 'name:%s' % rnd.randint(0, 9999)}]),
+            'url': 'http://api.linkedin.com/v1/people/%s' % member_id,
+        },
+        'firstName': rnd.choice(FIRST_NAMES),
+        'headline': u'Engineer at Company %s' % rnd.randint(0, 500),
+        'id': member_id,
+        'industry': rnd.choice(INDUSTRIES),
+        'lastName': rnd.choice(LAST_NAMES),
+        'location': {'country': {'code': country}, 'name': location_name},
+        'pictureUrl': 'http://m3.licdn.com/mpr/mprx/0_%s' % member_id,
+        'publicProfileUrl': 'http://www.linkedin.com/in/%s' % member_id,
+        'siteStandardProfileRequest': {
+            'url': 'http://www.linkedin.com/profile?viewProfile=&key=%s'
+                   '&authToken=idE-&authType=name&trk=api*a165186*s173442*'
+                   % i},
+    }
+    if full:
+        profile.update({
+            'numConnections': rnd.randint(0, 500),
+            'summary': u'\u2022 Builds things. ' * rnd.randint(1, 20),
+            'positions': _listing([{
+                'company': {'id': rnd.randint(1, 99999),
+                            'industry': rnd.choice(INDUSTRIES),
+                            'name': u'Company %s' % rnd.randint(0, 500),
+                            'size': '51-200 employees',
+                            'type': 'Privately Held'},
+                'id': rnd.randint(1, 10 ** 9),
+                'isCurrent': j == 0,
+                'startDate': _date(rnd),
+                'summary': u'Worked on the platform team. ' * 3,
+                'title': u'Software Engineer',
+            } for j in range(rnd.randint(1, 4))]),
+            'educations': _listing([{
+                'degree': u'BS', 'endDate': {'year': 2004},
+                'fieldOfStudy': u'Computer Science',
+                'id': rnd.randint(1, 10 ** 6),
+                'schoolName': u'State University',
+                'startDate': {'year': 2000},
+            } for j in range(rnd.randint(1, 2))]),
+            'skills': _listing([{
+                'id': rnd.randint(1, 10 ** 6),
+                'skill': {'name': u'Skill %s' % rnd.randint(0, 300)},
+            } for j in range(rnd.randint(0, 15))]),
+        })
+    return profile
+
+
+def connections_page(start=0, count=500, total=None, full=False):
+    """
+    A page of get_user_connections results.
+    """
+    total = start + count if total is None else total
+    values = [person(i, full) for i in range(start, min(start + count, total))]
+    return {'_count': len(values), '_start': start, '_total': total,
+            'values': values}
+
+
+def network_updates(start=0, count=250, total=None, newest=1351720757000):
+    """
+    A page of get_network_updates results, newest first.
+    """
+    total = start + count if total is None else total
+    values = []
+    for i in range(start, min(start + count, total)):
+        rnd = random.Random(-i - 1)
+        values.append({
+            'isCommentable': True,
+            'isLikable': True,
+            'timestamp': newest - i * 60000,
+            'updateContent': {'person': person(i)},
+            'updateKey': 'UNIU-%s-%s-SHARE' % (i, rnd.randint(0, 10 ** 9)),
+            'updateType': rnd.choice(UPDATE_TYPES),
+        })
+    return {'_count': len(values), '_start': start, '_total': total,
+            'values': values}
@@ -0,0 +1,146 @@
+from contextlib import contextmanager
+import threading
+import time
+
+from linkedin_json_client.lazy import LazyModule
+
+oauth = LazyModule('oauth2')
+
+
+class ConnectionPool(object):
+    """
+    A thread-safe pool of oauth.Client instances. Each oauth.Client is an
+    httplib2.Http, which keeps its keep-alive connections open between calls,
+    so reusing clients avoids paying a new TCP+TLS handshake per request.
+    Clients are bound to the requested token on checkout, so the same
+    connections are shared across calls and across access tokens.
+        size - the maximum number of idle clients kept by the pool
+        idle_timeout - seconds an idle client is kept before it is closed
+        timeout - the default socket timeout of the clients
+    """
+
+    def __init__(self, consumer, size=10, idle_timeout=60, timeout=None):
+        self.consumer = consumer
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self._counters = {
+            'created': 0,
+            'reused': 0,
+            'discarded': 0,
+            'evicted': 0,
+            'in_use': 0,
+        }
+
+    def _close(self, client):
+        connections = getattr(client, 'connections', None) or {}
+        for conn in list(connections.values()):
+            try:
+                conn.close()
+            except Exception:
+                pass
+        if connections:
+            connections.clear()
+
+    def _set_timeout(self, client, timeout):
+        """
+        Apply timeout to the client and to its already open connections.
+        """
+        client.timeout = timeout
+        connections = getattr(client, 'connections', None) or {}
+        for conn in list(connections.values()):
+            conn.timeout = timeout
+            if getattr(conn, 'sock', None) is not None:
+                conn.sock.settimeout(timeout)
+
+    def _evict_idle(self, now):
+        """
+        Close idle clients that have not been used within idle_timeout.
+        Must be called while holding the lock.
+        """
+        if not self.idle_timeout:
+            return
+        fresh = []
+        for client, last_used in self._idle:
+            if now - last_used > self.idle_timeout:
+                self._close(client)
+                self._counters['evicted'] += 1
+            else:
+                fresh.append((client, last_used))
+        self._idle = fresh
+
+    def acquire(self, token=None, timeout=None):
+        """
+        Check out a client bound to token. The most recently used idle client
+        is preferred, because its connections are the most likely to still
+        be open. "timeout" overrides the pool timeout for this checkout.
+        """
+        with self._lock:
+            self._evict_idle(time.time())
+            client = None
+            if self._idle:
+                client = self._idle.pop()[0]
+                self._counters['reused'] += 1
+            self._counters['in_use'] += 1
+        if client is None:
+            client = oauth.Client(self.consumer, token=token)
+            with self._lock:
+                self._counters['created'] += 1
+        client.token = token
+        self._set_timeout(
+            client, self.timeout if timeout is None else timeout)
+        return client
+
+    def release(self, client):
+        """
+        Return a client to the pool; clients beyond the pool size are closed.
+        """
+        client.token = None
+        with self._lock:
+            self._counters['in_use'] -= 1
+            if len(self._idle) < self.size:
+                self._idle.append((client, time.time()))
+                return
+            self._counters['discarded'] += 1
+        self._close(client)
+
+    def discard(self, client):
+        """
+        Close a client instead of returning it, e.g. after a socket error.
+        """
+        with self._lock:
+            self._counters['in_use'] -= 1
+            self._counters['discarded'] += 1
+        self._close(client)
+
+    def clear(self):
+        """
+        Close all idle clients.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for client, last_used in idle:
+            self._close(client)
+
+    @contextmanager
+    def connection(self, token=None, timeout=None):
+        client = self.acquire(token, timeout)
+        try:
+            yield client
+        except Exception:
+            self.discard(client)
+            raise
+        else:
+            self.release(client)
+
+    def stats(self):
+        """
+        Return a snapshot of the pool counters. "reused" counts checkouts
+        served by an already connected client, "created" counts new clients.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats['idle'] = len(self._idle)
+        return stats
@@ -0,0 +1,178 @@
+from functools import wraps
+import re
+import threading
+
+from linkedin_json_client.constants import (
+    BasicProfileFields, BoundAccountTypeFields, CertificationFields,
+    CompanyFields, ConnectionFields, ContactInfoFields, CourseFields,
+    EducationFields, EmailFields, FullProfileFields, GroupMembershipFields,
+    LanguagesFields, NetworkUpdateFields, PatentsFields, PositionFields,
+    PublicationFields, RecommendationFields, SkillsFields,
+    VolunteerExperienceFields, to_selector)
+
+SELECTOR_RE = re.compile(r'^[a-z][a-z0-9-]*(:\(.+\))?$')
+
+
+def _field_names(*fields_classes):
+    """
+    The selectors of fields_classes, both verbatim (e.g.
+    'location:(name)') and as bare names (e.g. 'location').
+    """
+    names = set()
+    for fields in fields_classes:
+        for attr, value in vars(fields).items():
+            if '__' != attr[:2]:
+                selector = to_selector(value)
+                names.add(selector)
+                names.add(selector.split(':', 1)[0])
+    return frozenset(names)
+
+
+def _built_once(build):
+    """
+    Memoize a function building a table of valid selectors, so that the
+    *Fields classes are only converted when a projection first needs them.
+    """
+    tables = []
+
+    @wraps(build)
+    def table():
+        if not tables:
+            tables.append(build())
+        return tables[0]
+    return table
+
+
+@_built_once
+def people_fields():
+    return _field_names(
+        BasicProfileFields, ConnectionFields, ContactInfoFields, EmailFields,
+        FullProfileFields, GroupMembershipFields, NetworkUpdateFields)
+
+
+@_built_once
+def section_fields():
+    """
+    The valid sub-selectors of structured profile sections.
+    """
+    return {
+        'bound-account-types': _field_names(BoundAccountTypeFields),
+        'certifications': _field_names(CertificationFields),
+        'company': _field_names(CompanyFields),
+        'courses': _field_names(CourseFields),
+        'educations': _field_names(EducationFields),
+        'languages': _field_names(LanguagesFields),
+        'patents': _field_names(PatentsFields),
+        'positions': _field_names(PositionFields),
+        'publications': _field_names(PublicationFields),
+        'recommendations-received': _field_names(RecommendationFields),
+        'skills': _field_names(SkillsFields),
+        'three-current-positions': _field_names(PositionFields),
+        'three-past-positions': _field_names(PositionFields),
+        'volunteer': _field_names(VolunteerExperienceFields),
+    }
+
+
+@_built_once
+def listing_fields():
+    """
+    The fields returned as listings of structured objects, the heavy parts
+    of a full profile.
+    """
+    return frozenset(section_fields()) | frozenset([
+        'following', 'group-memberships', 'job-bookmarks',
+        'member-url-resources', 'related-profile-views', 'suggestions'])
+
+
+class Projection(object):
+    """
+    A validated field-selector projection, compiled once into the URL
+    suffix appended to people URLs, e.g. ':(id,positions:(title))'.
+    Projections are lists whose items are either a selector (or camel-case
+    field) string, or a (selector, sub_projection) pair for a nested
+    projection, e.g.
+        [BasicProfileSelectors.ID,
+         (BasicProfileSelectors.POSITION, [
+            PositionFields.TITLE,
+            (PositionFields.COMPANY, [CompanyFields.NAME])])]
+    A ValueError is raised for unknown selectors.
+    """
+
+    def __init__(self, projection, valid_names=None):
+        if valid_names is None:
+            valid_names = people_fields()
+        self.suffix = ':(%s)' % self._compile(projection, valid_names, '')
+
+    def _compile(self, projection, valid_names, path):
+        if not projection:
+            raise ValueError('Empty projection%s' % (
+                path and ' for "%s"' % path))
+        parts = []
+        for item in projection:
+            if isinstance(item, basestring):
+                name, children = to_selector(item), None
+            else:
+                name, children = to_selector(item[0]), item[1]
+            self._check(name, valid_names, path)
+            if children is None:
+                parts.append(name)
+            else:
+                sub_path = path + name + '/'
+                parts.append('%s:(%s)' % (name, self._compile(
+                    children, section_fields().get(name), sub_path)))
+        return ','.join(parts)
+
+    def _check(self, name, valid_names, path):
+        if not SELECTOR_RE.match(name):
+            raise ValueError('Invalid selector "%s%s"' % (path, name))
+        if valid_names is not None and name not in valid_names:
+            raise ValueError('Unknown selector "%s%s"' % (path, name))
+
+    def __str__(self):
+        return self.suffix
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _freeze(projection):
+    if isinstance(projection, basestring):
+        return projection
+    return tuple(_freeze(item) for item in projection)
+
+
+def compile_projection(projection):
+    """
+    Return the Projection for projection, compiling it on first use only.
+    """
+    key = _freeze(projection)
+    compiled = _cache.get(key)
+    if compiled is None:
+        compiled = Projection(projection)
+        with _cache_lock:
+            compiled = _cache.setdefault(key, compiled)
+    return compiled
+
+
+def split_projection(projection, groups=4):
+    """
+    Split a projection (a list of selectors, or the input of
+    compile_projection) into at most "groups" smaller projections: one of
+    all the plain fields, and the listings (positions, educations, skills,
+    ...) and nested selections spread evenly over the rest.
+    """
+    projection = list(projection)
+    if groups <= 1:
+        return [projection] if projection else []
+    plain, listings = [], []
+    for item in projection:
+        if (isinstance(item, basestring) and
+            to_selector(item).split(':', 1)[0] not in listing_fields()):
+            plain.append(item)
+        else:
+            listings.append(item)
+    count = max(1, min(len(listings), groups - (1 if plain else 0)))
+    return ([plain] if plain else []) + [
+        group for group in (listings[i::count] for i in range(count))
+        if group]
@@ -0,0 +1,144 @@
+import threading
+import time
+
+
+class TokenBucket(object):
+    """
+    A token bucket refilled at "rate" tokens per second, holding at most
+    "capacity" tokens. Calls reserve a token, possibly driving the bucket
+    negative, and wait until their reservation is covered, so waiting calls
+    are served in order. After a throttle response, the refill rate is cut
+    by "throttle_factor" and recovers linearly over "recovery_time" seconds.
+    """
+
+    def __init__(self, rate, capacity=None, throttle_factor=0.5,
+        recovery_time=60):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.throttle_factor = throttle_factor
+        self.recovery_time = recovery_time
+        self.tokens = self.capacity
+        self.factor = 1.0
+        self.throttles = 0
+        self.last = time.time()
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self.last)
+        self.last = now
+        if self.factor < 1.0 and self.recovery_time:
+            self.factor = min(1.0, self.factor + elapsed / self.recovery_time)
+        self.tokens = min(
+            self.capacity, self.tokens + elapsed * self.rate * self.factor)
+
+    def reserve(self, now):
+        """
+        Take a token and return the seconds to wait before using it.
+        """
+        self._refill(now)
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / (self.rate * self.factor)
+
+    def throttle(self, now):
+        self._refill(now)
+        self.factor = max(0.01, self.factor * self.throttle_factor)
+        self.tokens = min(self.tokens, 0.0)
+        self.throttles += 1
+
+    def is_idle(self, now):
+        self._refill(now)
+        return self.tokens >= self.capacity and self.factor >= 1.0
+
+    def snapshot(self, now):
+        self._refill(now)
+        return {
+            'rate': self.rate * self.factor,
+            'capacity': self.capacity,
+            'tokens': self.tokens,
+            'throttles': self.throttles,
+        }
+
+
+class RateLimiter(object):
+    """
+    Spaces out calls to stay under a per-consumer and a per-member (access
+    token) rate, in calls per second; either limit may be None. acquire
+    blocks until both buckets have a slot. Report throttle responses with
+    throttled, which slows the matching buckets down.
+    """
+    max_idle_members = 10000
+
+    def __init__(self, consumer_rate=None, consumer_burst=None,
+        member_rate=None, member_burst=None, **bucket_kwargs):
+        self.consumer_rate = consumer_rate
+        self.consumer_burst = consumer_burst
+        self.member_rate = member_rate
+        self.member_burst = member_burst
+        self.bucket_kwargs = bucket_kwargs
+        self.consumers = {}
+        self.members = {}
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def _buckets(self, consumer_key, token_key, now):
+        buckets = []
+        if self.consumer_rate:
+            if consumer_key not in self.consumers:
+                self.consumers[consumer_key] = TokenBucket(
+                    self.consumer_rate, self.consumer_burst,
+                    **self.bucket_kwargs)
+            buckets.append(self.consumers[consumer_key])
+        if self.member_rate and token_key is not None:
+            if token_key not in self.members:
+                if len(self.members) >= self.max_idle_members:
+                    self._prune(now)
+                self.members[token_key] = TokenBucket(
+                    self.member_rate, self.member_burst, **self.bucket_kwargs)
+            buckets.append(self.members[token_key])
+        return buckets
+
+    def _prune(self, now):
+        """
+        Forget member buckets that are full; a new bucket behaves the same.
+        """
+        for key, bucket in list(self.members.items()):
+            if bucket.is_idle(now):
+                del self.members[key]
+
+    def acquire(self, consumer_key, token_key=None):
+        """
+        Block until a call for consumer_key and token_key may be sent and
+        return the number of seconds waited.
+        """
+        with self._lock:
+            now = time.time()
+            wait = max([0.0] + [bucket.reserve(now) for bucket in
+                                self._buckets(consumer_key, token_key, now)])
+            self.waited += wait
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def throttled(self, consumer_key, token_key=None):
+        """
+        Slow down after LinkedIn rejected a call for exceeding its limits.
+        """
+        with self._lock:
+            now = time.time()
+            for bucket in self._buckets(consumer_key, token_key, now):
+                bucket.throttle(now)
+
+    def snapshot(self):
+        """
+        Return the current state of every bucket, for capacity planning.
+        """
+        with self._lock:
+            now = time.time()
+            return {
+                'waited': self.waited,
+                'consumers': dict((key, bucket.snapshot(now)) for key, bucket
+                                  in self.consumers.items()),
+                'members': dict((key, bucket.snapshot(now)) for key, bucket
+                                in self.members.items()),
+            }
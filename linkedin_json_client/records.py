@@ -0,0 +1,180 @@
+"""
+Compact, __slots__ based record types generated from the *Fields classes in
+constants.py. Records hold the same data as the decoded JSON dicts at a
+fraction of the memory, and structured sections (positions, educations,
+skills, ...) are only converted into records when first accessed.
+"""
+import re
+
+from linkedin_json_client.constants import (
+    BasicProfileFields, CertificationFields, CompanyFields, ConnectionFields,
+    ContactInfoFields, CourseFields, EducationFields, EmailFields,
+    FullProfileFields, GroupMembershipFields, LanguagesFields, PatentsFields,
+    PositionFields, PublicationFields, RecommendationFields, SkillsFields,
+    VolunteerExperienceFields)
+
+
+def json_key(field):
+    """
+    The JSON key of a field, e.g. 'location:(name)' -> 'location' and
+    'recommendation-text' -> 'recommendationText'.
+    """
+    return re.sub(r'-([a-z])', lambda m: m.group(1).upper(),
+                  field.split(':', 1)[0])
+
+
+def attribute_name(key):
+    """
+    The record attribute of a JSON key, e.g. 'firstName' -> 'first_name'.
+    """
+    return re.sub(r'([A-Z])', '_\\1', key).lower()
+
+
+class Record(object):
+    """
+    Base class of the generated records. Keys not described by the *Fields
+    classes are kept in "extra".
+    """
+    __slots__ = ('extra',)
+    keys = {}
+    sections = {}
+
+    @classmethod
+    def from_json(cls, data):
+        record = cls.__new__(cls)
+        keys = cls.keys
+        extra = None
+        for attr in cls.__slots__:
+            setattr(record, attr, None)
+        for key, value in data.iteritems():
+            attr = keys.get(key)
+            if attr is None:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+            else:
+                setattr(record, attr, value)
+        record.extra = extra
+        return record
+
+    def to_dict(self):
+        """
+        Convert the record back into the JSON dict it was built from.
+        """
+        data = dict(self.extra or {})
+        for key, attr in self.keys.iteritems():
+            value = getattr(self, attr)
+            if value is None:
+                continue
+            if isinstance(value, Record):
+                value = value.to_dict()
+            elif isinstance(value, RecordList):
+                value = {'_total': value.total, 'values': [
+                    v.to_dict() for v in value]}
+            data[key] = value
+        return data
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '<%s %r>' % (type(self).__name__, self.to_dict())
+
+
+class RecordList(list):
+    """
+    The records of a listing section; "total" is the listing's "_total",
+    which may be larger than the number of records returned.
+    """
+    __slots__ = ('total',)
+
+
+def _lazy_section(slot, record_class):
+    """
+    A property parsing the raw JSON of a section into record_class records
+    on first access. Listings ({'_total': n, 'values': [...]}) become lists
+    of records and single objects become one record.
+    """
+    def get(self):
+        value = getattr(self, slot)
+        if isinstance(value, dict):
+            if 'values' in value or '_total' in value:
+                records = RecordList(record_class.from_json(v)
+                                     for v in value.get('values', []))
+                records.total = value.get('_total', len(records))
+                value = records
+            else:
+                value = record_class.from_json(value)
+            setattr(self, slot, value)
+        return value
+
+    def set(self, value):
+        setattr(self, slot, value)
+    return property(get, set)
+
+
+def make_record_class(name, fields_classes, sections=None):
+    """
+    Generate a record class with a slot per JSON key of fields_classes.
+    "sections" maps JSON keys to the record class of their lazily parsed
+    value.
+    """
+    sections = sections or {}
+    keys = {}
+    for fields in fields_classes:
+        for attr, value in vars(fields).items():
+            if '__' != attr[:2]:
+                key = json_key(value)
+                keys[key] = attribute_name(key)
+    for key in sections:
+        keys[key] = attribute_name(key)
+
+    attrs = {'keys': {}, 'sections': sections}
+    slots = []
+    for key, attr in sorted(keys.items()):
+        if key in sections:
+            slot = '_' + attr
+            attrs[attr] = _lazy_section(slot, sections[key])
+        else:
+            slot = attr
+        attrs['keys'][key] = slot
+        slots.append(slot)
+    attrs['__slots__'] = tuple(slots)
+    return type(name, (Record,), attrs)
+
+
+CertificationRecord = make_record_class(
+    'CertificationRecord', [CertificationFields])
+CompanyRecord = make_record_class('CompanyRecord', [CompanyFields])
+CourseRecord = make_record_class('CourseRecord', [CourseFields])
+EducationRecord = make_record_class('EducationRecord', [EducationFields])
+LanguageRecord = make_record_class('LanguageRecord', [LanguagesFields])
+PatentRecord = make_record_class('PatentRecord', [PatentsFields])
+PositionRecord = make_record_class(
+    'PositionRecord', [PositionFields], {'company': CompanyRecord})
+PublicationRecord = make_record_class('PublicationRecord', [PublicationFields])
+RecommendationRecord = make_record_class(
+    'RecommendationRecord', [RecommendationFields])
+SkillRecord = make_record_class('SkillRecord', [SkillsFields])
+VolunteerExperienceRecord = make_record_class(
+    'VolunteerExperienceRecord', [VolunteerExperienceFields])
+
+ProfileRecord = make_record_class(
+    'ProfileRecord', [
+        BasicProfileFields, ConnectionFields, ContactInfoFields, EmailFields,
+        FullProfileFields, GroupMembershipFields], {
+        'certifications': CertificationRecord,
+        'courses': CourseRecord,
+        'educations': EducationRecord,
+        'languages': LanguageRecord,
+        'patents': PatentRecord,
+        'positions': PositionRecord,
+        'publications': PublicationRecord,
+        'recommendationsReceived': RecommendationRecord,
+        'skills': SkillRecord,
+        'threeCurrentPositions': PositionRecord,
+        'threePastPositions': PositionRecord,
+    })
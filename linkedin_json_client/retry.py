@@ -0,0 +1,55 @@
+from email.utils import mktime_tz, parsedate_tz
+import random
+import time
+
+
+class RetryPolicy(object):
+    """
+    When and how long to wait before retrying a failed request. Socket errors
+    and "retry_statuses" responses are retried up to "max_attempts" calls in
+    total, waiting an exponential backoff with full jitter (or the
+    Retry-After header, when it is longer) between attempts. Only GETs are
+    retried unless "retry_writes" is True. "deadline" is the overall budget
+    of a call in seconds: it bounds the socket timeout of every attempt and
+    no retry is started that could not finish in time.
+    """
+    idempotent_methods = ('GET', 'HEAD')
+
+    def __init__(self, max_attempts=3, backoff=0.1, max_backoff=10.0,
+        deadline=None, retry_writes=False,
+        retry_statuses=(429, 500, 502, 503, 504)):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.retry_writes = retry_writes
+        self.retry_statuses = retry_statuses
+
+    def can_retry(self, method):
+        return self.retry_writes or method in self.idempotent_methods
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Return the seconds to wait after the failed attempt number "attempt"
+        (starting at 1).
+        """
+        delay = random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+        retry_after = self.parse_retry_after(retry_after)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def parse_retry_after(self, value):
+        """
+        Retry-After is either a number of seconds or an HTTP date.
+        """
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            parsed = parsedate_tz(value)
+            if parsed is None:
+                return None
+            return max(0.0, mktime_tz(parsed) - time.time())
@@ -0,0 +1,129 @@
+import base64
+import binascii
+from hashlib import sha1
+import hmac
+import random
+import time
+import urllib
+import urlparse
+
+FORM_CONTENT_TYPE = 'application/x-www-form-urlencoded'
+
+
+def escape(s):
+    """
+    Percent-encode s as required by OAuth 1.0a, including any '/'.
+    """
+    if isinstance(s, unicode):
+        s = s.encode('utf-8')
+    return urllib.quote(s, safe='~')
+
+
+class OAuthSigner(object):
+    """
+    An HMAC-SHA1 OAuth 1.0a signer producing the same requests as
+    oauth.Client.request, without its generic oauth.Request machinery. The
+    consumer parameters are encoded once, and the HMAC key derived from the
+    consumer and token secrets is cached per token, so signing a request
+    only hashes its base string.
+    """
+    signature_method = 'HMAC-SHA1'
+    version = '1.0'
+    empty_body_hash = base64.b64encode(sha1('').digest())
+    max_cached_keys = 10000
+
+    def __init__(self, consumer):
+        self.consumer = consumer
+        self._key_prefix = escape(consumer.secret) + '&'
+        self._static_params = [
+            ('oauth_consumer_key', escape(consumer.key)),
+            ('oauth_signature_method', self.signature_method),
+            ('oauth_version', self.version),
+        ]
+        self._hmacs = {}
+        self._random = random.SystemRandom()
+
+    def nonce(self):
+        return str(self._random.randint(0, 100000000))
+
+    def _hmac(self, token):
+        """
+        Return a fresh copy of the HMAC keyed for token.
+        """
+        secret = token.secret if token else ''
+        keyed = self._hmacs.get(secret)
+        if keyed is None:
+            if len(self._hmacs) >= self.max_cached_keys:
+                self._hmacs.clear()
+            keyed = hmac.new(self._key_prefix + escape(secret), digestmod=sha1)
+            self._hmacs[secret] = keyed
+        return keyed.copy()
+
+    def sign(self, method, uri, token=None, body='', is_form_encoded=False,
+        nonce=None, timestamp=None):
+        """
+        Return the escaped (key, value) OAuth parameters, including the
+        signature, for a request.
+        """
+        scheme, netloc, path, query, fragment = urlparse.urlsplit(uri)
+        if scheme == 'http' and netloc[-3:] == ':80':
+            netloc = netloc[:-3]
+        elif scheme == 'https' and netloc[-4:] == ':443':
+            netloc = netloc[:-4]
+
+        params = list(self._static_params)
+        params.append(('oauth_nonce', nonce or self.nonce()))
+        params.append(('oauth_timestamp', str(timestamp or int(time.time()))))
+        if token:
+            params.append(('oauth_token', escape(token.key)))
+            if token.verifier:
+                params.append(('oauth_verifier', escape(token.verifier)))
+        if not is_form_encoded:
+            params.append(('oauth_body_hash', escape(
+                base64.b64encode(sha1(body).digest()) if body
+                else self.empty_body_hash)))
+
+        signed = list(params)
+        for k, v in urlparse.parse_qsl(query, keep_blank_values=True):
+            signed.append((escape(k), escape(v)))
+        if is_form_encoded and body:
+            for k, v in urlparse.parse_qsl(body, keep_blank_values=True):
+                signed.append((escape(k), escape(v)))
+        signed.sort()
+
+        base_string = '&'.join((
+            escape(method.upper()),
+            escape('%s://%s%s' % (scheme, netloc, path)),
+            escape('&'.join('%s=%s' % kv for kv in signed))))
+        keyed = self._hmac(token)
+        keyed.update(base_string)
+        params.append(('oauth_signature', escape(
+            binascii.b2a_base64(keyed.digest())[:-1])))
+        return params
+
+    def sign_request(self, method, uri, body='', headers=None, token=None):
+        """
+        Sign a request the way oauth.Client.request does and return the
+        (uri, body, headers) to send: GET parameters are added to the uri,
+        form-encoded parameters to the body and other methods use an
+        Authorization header.
+        """
+        headers = dict(headers or {})
+        if 'POST' == method:
+            headers.setdefault('Content-Type', FORM_CONTENT_TYPE)
+        is_form_encoded = FORM_CONTENT_TYPE == headers.get('Content-Type')
+
+        params = self.sign(
+            method, uri, token=token, body=body,
+            is_form_encoded=is_form_encoded)
+        encoded = '&'.join('%s=%s' % kv for kv in params)
+        if is_form_encoded:
+            body = body + '&' + encoded if body else encoded
+        elif 'GET' == method:
+            uri += ('&' if '?' in uri else '?') + encoded
+        else:
+            scheme, netloc = urlparse.urlsplit(uri)[:2]
+            headers['Authorization'] = 'OAuth realm="%s://%s", %s' % (
+                scheme, netloc,
+                ', '.join('%s="%s"' % kv for kv in params))
+        return uri, body, headers
@@ -0,0 +1,150 @@
+import codecs
+import re
+
+from linkedin_json_client.lazy import LazyModule
+
+simplejson = LazyModule('simplejson')
+
+# a JSON string (group 1 is None while its closing quote has not arrived),
+# or a structural character
+TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*(")?|[\[\]{},:]')
+WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+# the characters that may follow an array item
+DELIMITERS = frozenset(u',] \t\n\r')
+
+
+class ArrayItemParser(object):
+    """
+    Incrementally decodes the items of the array stored under "key" in the
+    top-level JSON object, e.g. the "values" of a connections page. Feed it
+    the response body in chunks; every call returns the items completed so
+    far. Only the unfinished item is buffered, so memory stays flat however
+    large the response is. Items are decoded with the raw_decode method of
+    "decoder", by default simplejson's C-accelerated decoder.
+    """
+
+    def __init__(self, key='values', decoder=None):
+        self.key = '"%s"' % key
+        self.decoder = decoder or simplejson.JSONDecoder()
+        self.utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.buf = u''
+        self.pos = 0
+        self.depth = 0
+        self.last_string = None
+        self.in_array = False
+        self.done = False
+        self.min_pending = 0
+
+    def feed(self, chunk, final=False):
+        items = []
+        if self.done:
+            return items
+        # decoding unicode is much faster than re-decoding bytes per item
+        self.buf += self.utf8.decode(chunk, final)
+        if not self.in_array:
+            self._find_array()
+        if self.in_array:
+            self._decode_items(items, final)
+        self.buf = self.buf[self.pos:]
+        self.pos = 0
+        return items
+
+    def _find_array(self):
+        """
+        Scan the top-level object until the opening bracket of the array.
+        """
+        buf = self.buf
+        pos = self.pos
+        while True:
+            match = TOKEN_RE.search(buf, pos)
+            if match is None:
+                pos = len(buf)
+                break
+            token = match.group()
+            if '"' == token[0]:
+                if match.group(1) is None:
+                    # wait for the rest of the string
+                    pos = match.start()
+                    break
+                if 1 == self.depth:
+                    self.last_string = token
+            elif token in '[{':
+                self.depth += 1
+                if ('[' == token and 2 == self.depth and
+                    self.last_string == self.key):
+                    self.in_array = True
+                    pos = match.end()
+                    break
+            elif token in ']}':
+                self.depth -= 1
+                if not self.depth:
+                    # the whole object was read without finding the array
+                    self.done = True
+                    pos = match.end()
+                    break
+            elif ',' == token and 1 == self.depth:
+                self.last_string = None
+            pos = match.end()
+        self.pos = pos
+
+    def _decode_items(self, items, final):
+        buf = self.buf
+        pos = self.pos
+        while True:
+            pos = WHITESPACE_RE.match(buf, pos).end()
+            if pos == len(buf):
+                break
+            if not final and len(buf) - pos < self.min_pending:
+                # retry an incomplete item once twice as much data arrived,
+                # so small chunks do not make decoding quadratic
+                break
+            char = buf[pos]
+            if ']' == char:
+                self.done = True
+                pos += 1
+                break
+            if ',' == char:
+                pos += 1
+                continue
+            try:
+                item, end = self.decoder.raw_decode(buf, pos)
+            except ValueError:
+                # the item is incomplete
+                self.min_pending = 2 * (len(buf) - pos)
+                break
+            if not final and (
+                end == len(buf) or buf[end] not in DELIMITERS):
+                # a number could still continue in the next chunk, e.g.
+                # "2" of "2.5", or "3" of "3e2"
+                break
+            items.append(item)
+            self.min_pending = 0
+            pos = end
+        self.pos = pos
+
+    def close(self):
+        """
+        Return the items left at the end of the document, and check that the
+        array was complete.
+        """
+        items = self.feed('', final=True)
+        if self.in_array and not self.done:
+            raise ValueError('Truncated JSON array: %r' % self.buf[:100])
+        return items
+
+
+def iter_array_items(chunks, key='values', decoder=None):
+    """
+    Yield the decoded items of the top-level "key" array of the JSON
+    document split across chunks.
+    """
+    parser = ArrayItemParser(key, decoder)
+    for chunk in chunks:
+        if parser.done:
+            # read the rest of the document, so that a streamed response
+            # leaves its keep-alive connection reusable
+            continue
+        for item in parser.feed(chunk):
+            yield item
+    for item in parser.close():
+        yield item
@@ -0,0 +1,176 @@
+import sqlite3
+import threading
+
+import simplejson
+
+from linkedin_json_client.async_api import blocking
+from linkedin_json_client.concurrency import imap_unordered
+
+
+class WatermarkStore(object):
+    """
+    Stores the per-user high-water mark of synced network updates. A mark is
+    the newest update timestamp (UTC milliseconds) seen for the user, plus
+    the keys of the updates with exactly that timestamp, which are needed to
+    dedupe updates returned again by the next "after" query.
+    """
+
+    def get(self, user_id):
+        """
+        Return (timestamp, keys) for user_id, or (None, frozenset()).
+        """
+        raise NotImplementedError
+
+    def advance(self, user_id, timestamp, keys):
+        """
+        Atomically move the mark of user_id forward to timestamp. Older
+        timestamps are ignored and keys seen at an equal timestamp are
+        merged, so concurrent syncs of the same user never move it back.
+        """
+        raise NotImplementedError
+
+    def _merge(self, current, timestamp, keys):
+        current_timestamp, current_keys = current
+        if current_timestamp is None or timestamp > current_timestamp:
+            return timestamp, frozenset(keys)
+        if timestamp == current_timestamp:
+            return timestamp, current_keys | frozenset(keys)
+        return current
+
+
+class MemoryWatermarkStore(WatermarkStore):
+    """
+    An in-process WatermarkStore, mostly useful for tests and single runs.
+    """
+
+    def __init__(self):
+        self._marks = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            return self._marks.get(user_id, (None, frozenset()))
+
+    def advance(self, user_id, timestamp, keys):
+        with self._lock:
+            self._marks[user_id] = self._merge(
+                self._marks.get(user_id, (None, frozenset())),
+                timestamp, keys)
+
+
+class SQLiteWatermarkStore(WatermarkStore):
+    """
+    A WatermarkStore persisted to an SQLite file, safe to share between
+    threads and processes.
+    """
+
+    def __init__(self, path, timeout=30):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS watermarks ('
+            'user_id TEXT PRIMARY KEY, timestamp INTEGER NOT NULL, '
+            'keys TEXT NOT NULL)')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _select(self, conn, user_id):
+        row = conn.execute(
+            'SELECT timestamp, keys FROM watermarks WHERE user_id = ?',
+            (user_id,)).fetchone()
+        if row is None:
+            return None, frozenset()
+        return row[0], frozenset(simplejson.loads(row[1]))
+
+    def get(self, user_id):
+        return self._select(self._connection(), user_id)
+
+    def advance(self, user_id, timestamp, keys):
+        conn = self._connection()
+        # take the write lock before reading, so the merge is atomic
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            timestamp, keys = self._merge(
+                self._select(conn, user_id), timestamp, keys)
+            conn.execute(
+                'INSERT OR REPLACE INTO watermarks (user_id, timestamp, keys) '
+                'VALUES (?, ?, ?)',
+                (user_id, timestamp, simplejson.dumps(sorted(keys))))
+        except:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+
+class NetworkUpdateSync(object):
+    """
+    Incrementally syncs network updates. Only updates newer than the stored
+    mark are requested, updates already seen are dropped by update key, and
+    the mark is advanced once a sync completes, so repeated polling only
+    transfers new updates. "api" is a LinkedInJsonAPI, or an
+    AsyncLinkedInJsonAPI whose blocking client is used.
+    """
+
+    def __init__(self, api, store=None, page_size=250):
+        self.api = blocking(api)
+        self.store = store if store is not None else MemoryWatermarkStore()
+        self.page_size = page_size
+
+    def sync(self, user_id, access_token, **query_args):
+        """
+        Return the network updates for user_id that are newer than its mark,
+        newest first as returned by the API, and advance the mark. Valid
+        keyword arguments are those of get_network_updates, except "after",
+        "start" and "count", which are managed by the sync.
+        """
+        mark, seen = self.store.get(user_id)
+        if mark is not None:
+            query_args['after'] = mark
+
+        updates = []
+        keys = set(seen)
+        start = 0
+        while True:
+            page = self.api.decode(self.api.get_network_updates(
+                access_token, start=start, count=self.page_size,
+                **query_args))
+            values = page.get('values', [])
+            for update in values:
+                key, timestamp = update.get('updateKey'), update['timestamp']
+                if key in keys or (mark is not None and timestamp < mark):
+                    continue
+                keys.add(key)
+                updates.append(update)
+            start += len(values)
+            if not values or start >= page.get('_total', 0):
+                break
+
+        if updates:
+            newest = max(update['timestamp'] for update in updates)
+            self.store.advance(user_id, newest, [
+                update.get('updateKey') for update in updates
+                if update['timestamp'] == newest])
+        return updates
+
+    def sync_many(self, users, max_workers=10, **query_args):
+        """
+        Sync many users concurrently. "users" is an iterable of
+        (user_id, access_token) pairs. Results are yielded in completion
+        order as (user_id, updates, error) tuples.
+        """
+        def sync_user(user):
+            return self.sync(user[0], user[1], **dict(query_args))
+
+        for user, future in imap_unordered(
+            sync_user, users, max_workers=max_workers):
+            try:
+                yield user[0], future.result(), None
+            except Exception as e:
+                yield user[0], None, e
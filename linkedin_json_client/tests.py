@@ -1,13 +1,47 @@
 #!/usr/bin/env python
+from contextlib import contextmanager
+from datetime import datetime
 import httplib2
 from mock import patch
+import multiprocessing
+import os
+import re
+import shutil
+import socket
+from StringIO import StringIO
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import unittest
+import urllib
 import urlparse
 import simplejson
 
-from linkedin_json_client import api
+from linkedin_json_client import api, async_api, constants, sync
+from linkedin_json_client.bulk import BulkResult, BulkSender
+from linkedin_json_client.cache import ResponseCache, SQLiteResponseCache
+from linkedin_json_client.cassette import (
+    Cassette, CassetteRecorder, replay_class)
+from linkedin_json_client.circuit import CircuitBreaker
+from linkedin_json_client import columnar
+from linkedin_json_client.instrumentation import (
+    MetricsObserver, endpoint_template)
+from linkedin_json_client.fakeserver import FakeLinkedInServer, client_class
+from linkedin_json_client import harvest, loadtest
+from linkedin_json_client.hedging import HedgePolicy
+from linkedin_json_client.projections import compile_projection, to_selector
+from linkedin_json_client.ratelimit import RateLimiter
+from linkedin_json_client.records import ProfileRecord, RecordList
+from linkedin_json_client.retry import RetryPolicy
+from linkedin_json_client.signing import OAuthSigner
+from linkedin_json_client.streaming import iter_array_items
 from linkedin_json_client.constants import (
-    LinkedInScope, BasicProfileFields, BasicProfileSelectors, FullProfileSelectors)
+    LinkedInScope, BasicProfileFields, BasicProfileSelectors, CompanyFields,
+    FullProfileSelectors, PositionFields)
+from linkedin_json_client.errors import (
+    CircuitOpenError, LinkedInApiJsonClientError)
 
 """
 
@@ -15,9 +49,9 @@ https://api.linkedin.com/v1/people/~/email-address
 null
 """
 
-class TestApi(unittest.TestCase):
+class ApiTestCase(unittest.TestCase):
     def setUp(self):
-        super(TestApi, self).setUp()
+        super(ApiTestCase, self).setUp()
         self.consumer_key = 'key'
         self.consumer_secret = 'secret'
 
@@ -34,6 +68,19 @@ class TestApi(unittest.TestCase):
 
         self.api = api.LinkedInJsonAPI(self.consumer_key, self.consumer_secret)
 
+    @contextmanager
+    def _patchedClient(self):
+        """
+        Patch oauth.Client and yield the mock returned for every pooled
+        client. The attributes the pool touches are configured up front,
+        because MagicMock creates missing attributes racily when threads
+        share it.
+        """
+        with patch('linkedin_json_client.api.oauth.Client') as patched_Client:
+            client = patched_Client.return_value
+            client.connections = {}
+            yield client
+
     def _responseFactory(self, info=None):
         d = {
             'status': '200',
@@ -66,6 +113,8 @@ class TestApi(unittest.TestCase):
 
         return httplib2.Response(d)
 
+
+class TestApi(ApiTestCase):
     def test_get_access_token(self):
         """
         Tests that expected responses from the LinkedIn API for
@@ -279,5 +328,1392 @@ class TestApi(unittest.TestCase):
                 profile[BasicProfileFields.TWITTER_ACCOUNTS],
                 data[BasicProfileFields.TWITTER_ACCOUNTS])
 
+    def test_connection_reuse(self):
+        """
+        Tests that consecutive requests, even with different tokens, reuse
+        the pooled client instead of opening a new connection per call.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        other_token = dict(access_token, oauth_token='other')
+
+        with patch('linkedin_json_client.api.oauth.Client') as patched_Client:
+            client = patched_Client.return_value
+            client.request.return_value = (
+                self._responseFactoryAPI({'content-length': '4'}), 'null')
+            self.api.get_email_address(access_token)
+            self.api.get_email_address(other_token)
+            self.api.get_email_address(access_token)
+
+            self.failUnlessEqual(patched_Client.call_count, 1)
+            stats = self.api.pool.stats()
+            self.failUnlessEqual(stats['created'], 1)
+            self.failUnlessEqual(stats['reused'], 2)
+            self.failUnlessEqual(stats['idle'], 1)
+            self.failUnlessEqual(stats['in_use'], 0)
+
+    def test_get_user_profile_scattered(self):
+        """
+        Tests that selectors are fetched in at most "groups" parallel groups
+        and merged, and that failed groups degrade to a partial profile.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        data = {
+            'id': 'abc', 'firstName': 'John',
+            'positions': {'_total': 1, 'values': [{'title': 'CEO'}]},
+            'educations': {'_total': 0},
+            'skills': {'_total': 0},
+        }
+        selectors = [
+            BasicProfileSelectors.ID, BasicProfileSelectors.FIRST_NAME,
+            (BasicProfileSelectors.POSITION, [PositionFields.TITLE]),
+            FullProfileSelectors.EDUCATIONS, FullProfileSelectors.SKILLS]
+        failing = set()
+        paths = []
+
+        def fake_request(uri, method, body='', headers=None):
+            path = urlparse.urlparse(uri).path
+            paths.append(path)
+            fields = re.findall(r'(?:\(|,)([a-z-]+)', path.split('~', 1)[1])
+            if failing & set(fields):
+                return (self._responseFactoryAPI({'status': '500'}),
+                        simplejson.dumps({'status': 500}))
+            return self._responseFactoryAPI(), simplejson.dumps(dict(
+                (k, v) for k, v in data.items()
+                if to_selector(k) in fields))
+
+        with self._patchedClient() as client:
+            client.request.side_effect = fake_request
+
+            self.failUnlessEqual(self.api.get_user_profile_scattered(
+                access_token, selectors, groups=3), data)
+            self.failUnlessEqual(sorted(paths), [
+                '/v1/people/~:(educations)',
+                '/v1/people/~:(id,first-name)',
+                '/v1/people/~:(positions:(title),skills)'])
+
+            del paths[:]
+            self.failUnlessEqual(self.api.get_user_profile_scattered(
+                access_token, selectors, groups=1), data)
+            self.failUnlessEqual(paths, [
+                '/v1/people/~:(id,first-name,positions:(title),educations,'
+                'skills)'])
+
+            failing.add('skills')
+            profile = self.api.get_user_profile_scattered(
+                access_token, selectors, groups=3)
+            self.failUnlessEqual(
+                profile.pop('_failedSelectors'),
+                ['positions:(title)', 'skills'])
+            self.failUnlessEqual(profile, {
+                'id': 'abc', 'firstName': 'John',
+                'educations': {'_total': 0}})
+
+            failing.update(['id', 'educations', 'positions'])
+            self.assertRaises(
+                LinkedInApiJsonClientError,
+                self.api.get_user_profile_scattered, access_token, selectors)
+
+    def test_get_user_profiles_many(self):
+        """
+        Tests that bulk profile fetches run concurrently, bounded by
+        max_workers, yield results in completion order, and report failing
+        tokens without stopping the batch.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        tokens = [dict(access_token, oauth_token='token%s' % i)
+                  for i in range(20)]
+        profiles_api = api.LinkedInJsonAPI(
+            self.consumer_key, self.consumer_secret, fast_signing=True)
+        lock = threading.Lock()
+        in_flight = [0, 0]
+
+        def fake_request(client, uri, method, body='', headers=None):
+            # signed requests carry their token in the URI
+            query = dict(urlparse.parse_qsl(urlparse.urlparse(uri).query))
+            key = query['oauth_token']
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            # the first token answers last
+            time.sleep(0.1 if 'token0' == key else 0.01)
+            with lock:
+                in_flight[0] -= 1
+            if 'token7' == key:
+                return (self._responseFactoryAPI({'status': '401'}),
+                        'oauth_problem=token_rejected')
+            return self._responseFactoryAPI(), simplejson.dumps({'id': key})
+
+        with patch.object(httplib2.Http, 'request') as patched_request:
+            patched_request.side_effect = fake_request
+            results = list(profiles_api.get_user_profiles_many(
+                tokens, max_workers=4))
+        profiles_api.pool.clear()
+
+        self.failUnlessEqual(
+            sorted(t['oauth_token'] for t, p, e in results),
+            sorted(t['oauth_token'] for t in tokens))
+        self.failUnlessEqual(in_flight[1], 4)
+        self.failIfEqual(results[0][0]['oauth_token'], 'token0')
+        for token, profile, error in results:
+            if token['oauth_token'] == 'token7':
+                self.failUnlessEqual(profile, None)
+                self.assertTrue(
+                    isinstance(error, LinkedInApiJsonClientError))
+            else:
+                self.failUnlessEqual(profile, {'id': token['oauth_token']})
+                self.failUnlessEqual(error, None)
+
+    def test_iter_user_connections(self):
+        """
+        Tests that iterating connections walks every page in order and
+        stops after the last page.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        people = [{'id': 'id%s' % i} for i in range(7)]
+
+        def fake_request(uri, method, body='', headers=None):
+            query = dict(urlparse.parse_qsl(urlparse.urlparse(uri).query))
+            start, count = int(query['start']), int(query['count'])
+            values = people[start:start + count]
+            return self._responseFactoryAPI(), simplejson.dumps({
+                '_count': len(values), '_start': start,
+                '_total': len(people), 'values': values})
+
+        with patch('linkedin_json_client.api.oauth.Client') as patched_Client:
+            client = patched_Client.return_value
+            client.request.side_effect = fake_request
+            result = list(self.api.iter_user_connections(
+                access_token, selectors=[BasicProfileSelectors.ID],
+                page_size=3))
+
+        self.failUnlessEqual(result, people)
+        self.failUnlessEqual(client.request.call_count, 3)
+
+    def test_response_cache(self):
+        """
+        Tests that cached GETs skip the network until a write by the same
+        token invalidates them, and that hits and misses are counted.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        self.api.cache = ResponseCache(maxsize=10, ttl=60)
+        data = {'firstName': 'John'}
+
+        with patch('linkedin_json_client.api.oauth.Client') as patched_Client:
+            client = patched_Client.return_value
+            client.request.return_value = (
+                self._responseFactoryAPI(), simplejson.dumps(data))
+            for i in range(3):
+                self.failUnlessEqual(
+                    self.api.get_user_profile(access_token), data)
+            self.api.get_user_profile(
+                access_token, selectors=[BasicProfileSelectors.ID])
+            self.failUnlessEqual(client.request.call_count, 2)
+
+            client.request.return_value = (self._responseFactoryAPI(), '')
+            self.api.set_status_update(access_token, 'Testing')
+            client.request.return_value = (
+                self._responseFactoryAPI(), simplejson.dumps(data))
+            self.api.get_user_profile(access_token)
+            self.failUnlessEqual(client.request.call_count, 4)
+
+        stats = self.api.cache.stats()
+        self.failUnlessEqual(stats['hits'], 2)
+        self.failUnlessEqual(stats['misses'], 3)
+        self.failUnlessEqual(stats['invalidations'], 2)
+        self.failUnlessEqual(stats['size'], 1)
+
+        # list arguments, such as update types, are part of the key
+        self.api.pool.clear()
+        with patch('linkedin_json_client.api.oauth.Client') as patched_Client:
+            client = patched_Client.return_value
+            client.request.return_value = (
+                self._responseFactoryAPI(), simplejson.dumps({'values': []}))
+            for i in range(2):
+                self.api.get_network_updates(access_token, type=['CONN'])
+            self.api.get_network_updates(access_token, type=['STAT'])
+            self.failUnlessEqual(client.request.call_count, 2)
+
+            # and so are headers, such as the language of the response
+            for language in ('en-US', 'fr-FR', 'fr-FR'):
+                self.api.get_user_profile(
+                    access_token, headers={'Accept-Language': language})
+            self.failUnlessEqual(client.request.call_count, 4)
+
+    def test_sqlite_response_cache(self):
+        """
+        Tests that the SQLite cache serves responses cached by another
+        process, and expires, evicts and invalidates them.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        token = self.api.get_user_token(access_token)
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, 'cache.db')
+            self.api.cache = SQLiteResponseCache(path, maxsize=2, ttl=60)
+            data = {'firstName': 'John'}
+
+            def fetch():
+                with patch('linkedin_json_client.api.oauth.Client') as \
+                    patched_Client:
+                    patched_Client.return_value.request.return_value = (
+                        self._responseFactoryAPI(), simplejson.dumps(data))
+                    self.api.get_user_profile(access_token)
+            child = multiprocessing.Process(target=fetch)
+            child.start()
+            child.join()
+            self.failUnlessEqual(child.exitcode, 0)
+
+            with patch('linkedin_json_client.api.oauth.Client') as \
+                patched_Client:
+                client = patched_Client.return_value
+                self.failUnlessEqual(
+                    self.api.get_user_profile(access_token), data)
+                self.failIf(client.request.called)
+
+            cache = SQLiteResponseCache(path, maxsize=2, ttl=60)
+            keys = [cache.make_key(token, 'http://example.com/%d' % i, {})
+                    for i in range(3)]
+            for key in keys:
+                cache.set(key, 'content')
+            self.failUnlessEqual(cache.get(keys[2]), 'content')
+            stats = cache.stats()
+            self.failUnlessEqual(stats['evictions'], 2)
+            self.failUnlessEqual(stats['size'], 2)
+
+            cache.ttl = -1
+            cache.set(keys[0], 'content')
+            self.failUnlessEqual(cache.get(keys[0]), None)
+            self.failUnlessEqual(cache.stats()['expirations'], 1)
+
+            cache.invalidate(token)
+            self.failUnlessEqual(cache.stats()['size'], 0)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_rate_limiter(self):
+        """
+        Tests that calls over the member limit wait for a slot instead of
+        failing, and that throttle responses slow the limiter down.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        self.api.rate_limiter = RateLimiter(
+            consumer_rate=1000, member_rate=50, member_burst=1)
+
+        with patch('linkedin_json_client.api.oauth.Client') as patched_Client:
+            client = patched_Client.return_value
+            client.request.return_value = (self._responseFactoryAPI(), 'null')
+            start = time.time()
+            for i in range(4):
+                self.api.get_email_address(access_token)
+            # the last three calls wait for a slot, 20ms apart
+            self.assertTrue(time.time() - start >= 0.055)
+            self.assertTrue(self.api.rate_limiter.snapshot()['waited'] > 0)
+
+            client.request.return_value = (
+                self._responseFactoryAPI({'status': '403'}),
+                simplejson.dumps({
+                    'errorCode': 0, 'status': 403, 'timestamp': 0,
+                    'message': 'Throttle limit for calls to this resource '
+                               'is reached.'}))
+            self.assertRaises(
+                LinkedInApiJsonClientError, self.api.get_email_address,
+                access_token)
+
+        snapshot = self.api.rate_limiter.snapshot()
+        member = snapshot['members'][access_token['oauth_token']]
+        self.failUnlessEqual(member['throttles'], 1)
+        self.assertTrue(member['rate'] < 50)
+        self.failUnlessEqual(
+            snapshot['consumers'][self.consumer_key]['throttles'], 1)
+
+    def test_retry_policy(self):
+        """
+        Tests that GETs are retried after socket errors and 5xx responses,
+        that writes are not retried by default, and that a Retry-After
+        beyond the deadline stops retrying.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        self.api.retry_policy = RetryPolicy(
+            max_attempts=3, backoff=0.001, deadline=1)
+        ok_response = (self._responseFactoryAPI(), 'null')
+        unavailable_response = (
+            self._responseFactoryAPI({'status': '503', 'retry-after': '0'}),
+            'error=unavailable')
+
+        with patch('linkedin_json_client.api.oauth.Client') as patched_Client:
+            client = patched_Client.return_value
+            client.request.side_effect = [
+                socket.error('reset'), unavailable_response, ok_response]
+            self.failUnlessEqual(
+                self.api.get_email_address(access_token), None)
+            self.failUnlessEqual(client.request.call_count, 3)
+
+            client.request.reset_mock()
+            client.request.side_effect = [unavailable_response, ok_response]
+            self.assertRaises(
+                LinkedInApiJsonClientError, self.api.set_status_update,
+                access_token, 'Testing')
+            self.failUnlessEqual(client.request.call_count, 1)
+
+            client.request.reset_mock()
+            client.request.side_effect = [(
+                self._responseFactoryAPI(
+                    {'status': '503', 'retry-after': '120'}),
+                'error=unavailable'), ok_response]
+            self.assertRaises(
+                LinkedInApiJsonClientError, self.api.get_email_address,
+                access_token)
+            self.failUnlessEqual(client.request.call_count, 1)
+
+    def test_circuit_breaker(self):
+        """
+        Tests that an endpoint failing too often fails fast without sending
+        requests, that other endpoints are unaffected, that a successful
+        probe closes its circuit, and that any failed probe reopens it.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        changes = []
+        self.api.circuit_breaker = CircuitBreaker(
+            window=4, min_calls=4, reset_timeout=0.05,
+            on_state_change=lambda *args: changes.append(args))
+        endpoint = endpoint_template(self.api.api_profile_url + ':(id)')
+
+        with patch('linkedin_json_client.api.oauth.Client') as patched_Client:
+            client = patched_Client.return_value
+            client.request.return_value = (
+                self._responseFactoryAPI({'status': '503'}),
+                simplejson.dumps({'status': 503}))
+            for i in range(4):
+                self.assertRaises(
+                    LinkedInApiJsonClientError, self.api.get_user_profile,
+                    access_token, selectors=[BasicProfileSelectors.ID])
+            try:
+                self.api.get_user_profile(
+                    access_token, selectors=[BasicProfileSelectors.ID])
+                self.fail('Expected a CircuitOpenError')
+            except CircuitOpenError as e:
+                self.failUnlessEqual(e.endpoint, endpoint)
+                self.failUnless(0 < e.retry_after <= 0.05)
+            self.failUnlessEqual(client.request.call_count, 4)
+            self.failUnlessEqual(changes, [(endpoint, 'closed', 'open')])
+
+            client.request.return_value = (self._responseFactoryAPI(), '')
+            self.api.set_status_update(access_token, 'Testing')
+            self.failUnlessEqual(client.request.call_count, 5)
+
+            time.sleep(0.06)
+            client.request.return_value = (
+                self._responseFactoryAPI(), simplejson.dumps({'id': 'x'}))
+            self.failUnlessEqual(self.api.get_user_profile(
+                access_token, selectors=[BasicProfileSelectors.ID]),
+                {'id': 'x'})
+        self.failUnlessEqual(changes[1:], [
+            (endpoint, 'open', 'half-open'),
+            (endpoint, 'half-open', 'closed')])
+        self.failUnlessEqual(
+            self.api.circuit_breaker.snapshot()[endpoint]['state'], 'closed')
+
+        # a probe interrupted by any exception still reopens the circuit,
+        # instead of leaving it half-open and failing every call
+        class Interrupted(BaseException):
+            pass
+
+        self.api.pool.clear()
+        with patch('linkedin_json_client.api.oauth.Client') as patched_Client:
+            client = patched_Client.return_value
+            client.request.return_value = (
+                self._responseFactoryAPI({'status': '503'}),
+                simplejson.dumps({'status': 503}))
+            for i in range(4):
+                self.assertRaises(
+                    LinkedInApiJsonClientError, self.api.get_user_profile,
+                    access_token, selectors=[BasicProfileSelectors.ID])
+            time.sleep(0.06)
+            client.request.side_effect = Interrupted
+            self.assertRaises(
+                Interrupted, self.api.get_user_profile,
+                access_token, selectors=[BasicProfileSelectors.ID])
+            self.failUnlessEqual(
+                self.api.circuit_breaker.state(endpoint), 'open')
+
+            time.sleep(0.06)
+            client.request.side_effect = None
+            client.request.return_value = (
+                self._responseFactoryAPI(), simplejson.dumps({'id': 'x'}))
+            self.failUnlessEqual(self.api.get_user_profile(
+                access_token, selectors=[BasicProfileSelectors.ID]),
+                {'id': 'x'})
+        self.failUnlessEqual(
+            self.api.circuit_breaker.state(endpoint), 'closed')
+
+    def test_hedge_policy(self):
+        """
+        Tests that a slow GET is hedged and answered by the hedge, that the
+        latency of first attempts sets the delay, and that hedges stay
+        within the extra load allowed.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        policy = HedgePolicy(initial_delay=0.02, min_samples=5, max_extra=0.5)
+        self.api.hedge_policy = policy
+        responses = [0.2, 0.0]
+
+        def request(*args, **kwargs):
+            # the first call is slow, the others fast
+            time.sleep(responses.pop(0) if responses else 0.0)
+            return (self._responseFactoryAPI(),
+                    simplejson.dumps({'id': 'x'}))
+
+        with self._patchedClient() as client:
+            client.request.side_effect = request
+            start = time.time()
+            self.failUnlessEqual(
+                self.api.get_user_profile(access_token), {'id': 'x'})
+            self.failUnless(time.time() - start < 0.15)
+            self.failUnlessEqual(
+                policy.stats(),
+                {'requests': 1, 'fired': 1, 'won': 1, 'denied': 0})
+
+            for i in range(5):
+                self.api.get_user_profile(access_token)
+            endpoint = endpoint_template(self.api.api_profile_url)
+            self.failUnless(policy.delay(endpoint) < 0.02)
+
+            # past the allowed extra load, slow requests are not hedged
+            policy.max_extra = 0.0
+            responses.append(0.05)
+            self.api.get_user_profile(access_token)
+        stats = policy.stats()
+        self.failUnlessEqual(stats['fired'], 1)
+        self.failUnlessEqual(stats['denied'], 1)
+
+    def test_hedge_policy_set_later(self):
+        """
+        Tests that a hedge policy set after a client is created is used,
+        and that its threads are only started by the first hedged GET.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        client_api = api.LinkedInJsonAPI(
+            self.consumer_key, self.consumer_secret)
+        client_api.hedge_policy = HedgePolicy(max_workers=2)
+        self.failIf('hedge_executor' in vars(client_api))
+
+        with self._patchedClient() as client:
+            client.request.return_value = (
+                self._responseFactoryAPI(), simplejson.dumps({'id': 'x'}))
+            self.failUnlessEqual(
+                client_api.get_user_profile(access_token), {'id': 'x'})
+        self.failUnlessEqual(client_api.hedge_executor._max_workers, 2)
+        self.failUnlessEqual(client_api.hedge_policy.stats()['requests'], 1)
+
+    def test_lazy_imports(self):
+        """
+        Tests that selectors are converted on first use, like
+        convert_fields_to_selectors did, and that importing the API or
+        creating a client does not import its dependencies.
+        """
+        for selectors in vars(constants).values():
+            if isinstance(selectors, constants.SelectorsType):
+                class Converted(object):
+                    pass
+                constants.convert_fields_to_selectors(
+                    Converted, selectors.fields)
+                for attr in dir(selectors.fields):
+                    if '__' != attr[:2]:
+                        self.failUnless(attr in dir(selectors))
+                        self.failUnlessEqual(
+                            getattr(selectors, attr), getattr(Converted, attr))
+        self.failUnlessEqual(
+            BasicProfileSelectors.LOCATION_NAME, 'location:(name)')
+        self.assertRaises(
+            AttributeError, getattr, BasicProfileSelectors, 'NO_SUCH_FIELD')
+
+        # neither importing the API nor creating a client loads them, in a
+        # process importing this package, wherever the tests are run from
+        package_dir = os.path.dirname(os.path.abspath(api.__file__))
+        loaded = subprocess.check_output([sys.executable, '-c', (
+            'import sys, linkedin_json_client.api as api; '
+            'api.LinkedInJsonAPI("key", "secret"); '
+            'print sorted(set(sys.modules) & set(["oauth2", "httplib2", '
+            '"linkedin_json_client.records"]))')],
+            cwd=os.path.dirname(package_dir))
+        self.failUnlessEqual(loaded.strip(), '[]')
+
+    def test_compile_projection(self):
+        """
+        Tests that nested projections compile to the expected URL suffix,
+        are memoized, and that unknown selectors fail at compile time.
+        """
+        projection = [
+            BasicProfileSelectors.ID, BasicProfileFields.FIRST_NAME,
+            BasicProfileSelectors.LOCATION_NAME,
+            (BasicProfileSelectors.POSITION, [
+                PositionFields.TITLE, PositionFields.IS_CURRENT,
+                (PositionFields.COMPANY, [CompanyFields.NAME])])]
+        compiled = compile_projection(projection)
+        self.failUnlessEqual(
+            compiled.suffix,
+            ':(id,first-name,location:(name),'
+            'positions:(title,is-current,company:(name)))')
+        self.assertTrue(compile_projection(projection) is compiled)
+        self.failUnlessEqual(
+            self.api.prepare_field_selectors(
+                compiled, self.api.api_profile_url),
+            self.api.api_profile_url + compiled.suffix)
+
+        self.assertRaises(ValueError, compile_projection, ['frist-name'])
+        self.assertRaises(ValueError, compile_projection, [
+            (BasicProfileSelectors.POSITION, [PositionFields.TITLE, 'titel'])])
+        self.assertRaises(ValueError, compile_projection, [
+            (BasicProfileSelectors.POSITION, [])])
+
+    def test_fast_signing(self):
+        """
+        Tests that OAuthSigner produces the same signatures as oauth2 and
+        that fast signing sends already signed requests.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        token = self.api.get_user_token(access_token)
+        signer = OAuthSigner(self.api.consumer)
+        cases = [
+            ('GET', self.api.api_profile_url + ':(id,first-name)?format=json',
+             '', False),
+            ('POST', self.api.api_shares_url + '?format=json', '<share/>',
+             False),
+            ('POST', self.api.request_token_path + '?scope=r_basicprofile',
+             '', True),
+        ]
+        for method, uri, body, is_form_encoded in cases:
+            req = api.oauth.Request.from_consumer_and_token(
+                self.api.consumer, token=token, http_method=method,
+                http_url=uri, body=body, is_form_encoded=is_form_encoded)
+            req['oauth_nonce'] = '1234'
+            req['oauth_timestamp'] = '1351720757'
+            req.sign_request(
+                api.oauth.SignatureMethod_HMAC_SHA1(), self.api.consumer,
+                token)
+            params = dict(signer.sign(
+                method, uri, token=token, body=body,
+                is_form_encoded=is_form_encoded, nonce='1234',
+                timestamp=1351720757))
+            self.failUnlessEqual(
+                urllib.unquote(params['oauth_signature']),
+                req['oauth_signature'])
+
+        fast_api = api.LinkedInJsonAPI(
+            self.consumer_key, self.consumer_secret, fast_signing=True)
+        with patch('linkedin_json_client.api.httplib2.Http.request') as send:
+            send.return_value = (self._responseFactoryAPI(), 'null')
+            self.failUnlessEqual(
+                fast_api.get_email_address(access_token), None)
+            uri = send.call_args[0][1]
+            query = dict(urlparse.parse_qsl(urlparse.urlparse(uri).query))
+            self.failUnlessEqual(query['oauth_token'], token.key)
+            self.assertTrue('oauth_signature' in query)
+
+    def test_json_decoder(self):
+        """
+        Tests that the JSON backend is configurable and that JSON error
+        responses are decoded into the raised error.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        decoded = []
+
+        def decoder(content):
+            decoded.append(content)
+            return simplejson.loads(content)
+
+        json_api = api.LinkedInJsonAPI(
+            self.consumer_key, self.consumer_secret, json_decoder=decoder)
+        self.failUnlessEqual(
+            api.LinkedInJsonAPI(
+                self.consumer_key, self.consumer_secret,
+                json_decoder='json').decode('{"id": "a"}'),
+            {'id': 'a'})
+
+        with patch('linkedin_json_client.api.oauth.Client') as patched_Client:
+            client = patched_Client.return_value
+            client.request.return_value = (
+                self._responseFactoryAPI(), '{"id": "a"}')
+            self.failUnlessEqual(
+                json_api.get_user_profile(access_token), {'id': 'a'})
+
+            client.request.return_value = (
+                self._responseFactoryAPI({'status': '403'}),
+                simplejson.dumps({
+                    'errorCode': 0, 'requestId': 'KPA3JXNBAJ', 'status': 403,
+                    'timestamp': 1346269248747,
+                    'message': 'Access to posting messages denied.'}))
+            try:
+                json_api.send_message(access_token, ['id'], 'subject', 'body')
+            except LinkedInApiJsonClientError as e:
+                self.failUnlessEqual(e.status, 403)
+                self.failUnlessEqual(e.error_json['requestId'], 'KPA3JXNBAJ')
+            else:
+                self.fail('LinkedInApiJsonClientError not raised')
+        self.failUnlessEqual(len(decoded), 2)
+
+    def test_records(self):
+        """
+        Tests that records mode returns ProfileRecords whose nested
+        sections are parsed on first access, and which convert back into
+        the original JSON.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        data = {
+            'id': 'OAwW7wk0xl', 'firstName': 'John', 'lastName': 'Smith',
+            'location': {'name': 'San Francisco Bay Area'},
+            'positions': {'_total': 3, 'values': [{
+                'id': 1, 'isCurrent': True, 'title': 'Tester',
+                'company': {'name': 'Product Testing'}}]},
+            'unknownField': 1,
+        }
+        records_api = api.LinkedInJsonAPI(
+            self.consumer_key, self.consumer_secret, records=True)
+
+        with patch('linkedin_json_client.api.oauth.Client') as patched_Client:
+            client = patched_Client.return_value
+            client.request.return_value = (
+                self._responseFactoryAPI(), simplejson.dumps(data))
+            profile = records_api.get_user_profile(access_token)
+
+            client.request.return_value = (
+                self._responseFactoryAPI(), simplejson.dumps({
+                    '_total': 1, 'values': [data]}))
+            page = records_api.get_user_connections(access_token)
+
+        self.assertTrue(isinstance(profile, ProfileRecord))
+        self.failUnlessEqual(profile.first_name, 'John')
+        self.failUnlessEqual(profile.location, data['location'])
+        self.failUnlessEqual(profile.extra, {'unknownField': 1})
+        self.assertTrue(isinstance(profile._positions, dict))
+        self.assertTrue(isinstance(profile.positions, RecordList))
+        self.failUnlessEqual(profile.positions.total, 3)
+        self.failUnlessEqual(profile.positions[0].is_current, True)
+        self.failUnlessEqual(
+            profile.positions[0].company.name, 'Product Testing')
+        self.failUnlessEqual(profile.to_dict(), data)
+        self.failUnlessEqual(page['values'], [profile])
+        self.assertRaises(AttributeError, setattr, profile, 'nickname', 'J')
+
+    def test_iter_array_items(self):
+        """
+        Tests that array items are decoded incrementally, whatever the
+        chunk boundaries, including inside strings and multi-byte chars.
+        """
+        values = [
+            {'id': 'a', 'headline': u'Tricky "values": [1, {2}] \\ \u2022'},
+            {'id': 'b', 'numConnections': 120},
+            12345,
+        ]
+        doc = simplejson.dumps({
+            '_total': 3, 'headers': {'values': [0]}, 'values': values,
+            'after': 1}, ensure_ascii=False).encode('utf-8')
+        for size in (1, 2, 7, 64, len(doc)):
+            chunks = [doc[i:i + size] for i in range(0, len(doc), size)]
+            self.failUnlessEqual(list(iter_array_items(chunks)), values)
+        self.failUnlessEqual(list(iter_array_items(['{"_total": 0}'])), [])
+
+        # numbers cut by a chunk boundary are decoded once complete
+        numbers = [2.5, 300.0, -0.00125, 17, {'x': 1.5}]
+        doc = '{"values": [2.5, 3e2,-1.25E-3 ,17, {"x": 1.5}]}'
+        for size in range(1, len(doc) + 1):
+            chunks = [doc[i:i + size] for i in range(0, len(doc), size)]
+            self.failUnlessEqual(list(iter_array_items(chunks)), numbers)
+        self.failUnlessEqual(
+            list(iter_array_items(['{"values": [2.', '5]}'])), [2.5])
+        self.failUnlessEqual(
+            list(iter_array_items(['{"values": [3e', '2]}'])), [300.0])
+        self.assertRaises(
+            ValueError, list, iter_array_items(['{"values": [{"id": ']))
+
+    def test_stream_user_connections(self):
+        """
+        Tests that streamed connections are read in chunks from a signed
+        request, and that errors are raised like other API calls.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        people = [{'id': 'id%s' % i, 'firstName': 'John'} for i in range(50)]
+        body = simplejson.dumps({'_total': len(people), 'values': people})
+
+        with patch('linkedin_json_client.api.httplib.HTTPSConnection') as \
+            patched_Connection:
+            resp = patched_Connection.return_value.getresponse.return_value
+            resp.status = 200
+            resp.read.side_effect = StringIO(body).read
+            result = list(self.api.stream_user_connections(
+                access_token, selectors=[BasicProfileSelectors.ID]))
+            self.failUnlessEqual(result, people)
+
+            conn = patched_Connection.return_value
+            path = conn.request.call_args[0][1]
+            self.assertTrue(path.startswith('/v1/people/~/connections:(id)?'))
+            self.assertTrue('oauth_signature=' in path)
+
+            # the keep-alive connection is kept in the pool and reused
+            resp.read.side_effect = StringIO(body).read
+            result = list(self.api.stream_user_connections(access_token))
+            self.failUnlessEqual(result, people)
+            self.failUnlessEqual(patched_Connection.call_count, 1)
+            self.failIf(conn.close.called)
+
+            # a stream closed early closes its connection
+            resp.read.side_effect = StringIO(body).read
+            stream = self.api.request_stream(
+                self.api.api_profile_connections_url, {}, chunk_size=10)
+            next(stream)
+            stream.close()
+            self.assertTrue(conn.close.called)
+
+            resp.status = 401
+            resp.read.side_effect = StringIO(
+                'oauth_problem=token_rejected').read
+            self.assertRaises(
+                LinkedInApiJsonClientError, list,
+                self.api.stream_user_connections(access_token))
+
+    def test_observers(self):
+        """
+        Tests that observers receive an event per request, including failed
+        and retried ones, and that metrics are exported.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        events = []
+        metrics = MetricsObserver()
+        observed_api = api.LinkedInJsonAPI(
+            self.consumer_key, self.consumer_secret, fast_signing=True,
+            retry_policy=RetryPolicy(backoff=0), observers=[events.append])
+        observed_api.observers.append(metrics)
+        content = simplejson.dumps({'id': 'abc'})
+
+        self.failUnlessEqual(
+            endpoint_template(
+                observed_api.api_comment_feed_url % {
+                    'NETWORK_UPDATE_KEY': 'UNIU-1-SHARE'}),
+            '/v1/people/~/network/updates/key={key}/update-comments')
+
+        with patch('linkedin_json_client.api.httplib2.Http.request') as \
+            patched_request:
+            patched_request.side_effect = [
+                (self._responseFactoryAPI({'status': '503'}), ''),
+                (self._responseFactoryAPI(), content),
+                (self._responseFactoryAPI({'status': '401'}),
+                 'oauth_problem=token_rejected'),
+            ]
+            observed_api.get_user_profile(
+                access_token, selectors=[BasicProfileSelectors.ID])
+            self.assertRaises(
+                LinkedInApiJsonClientError, observed_api.get_user_profile,
+                access_token)
+
+        event, failed = events
+        self.failUnlessEqual(event.endpoint, '/v1/people/~:(...)')
+        self.failUnlessEqual(
+            (event.method, event.source, event.status, event.retries,
+             event.bytes, event.request_id, event.error),
+            ('GET', 'network', 200, 1, len(content), 'IMNF2HTLXM', None))
+        self.failUnless(event.sign_time > 0)
+        self.failUnless(event.duration >= event.network_time > 0)
+        self.failUnless(event.decode_time > 0)
+        self.failUnlessEqual(failed.endpoint, '/v1/people/~')
+        self.failUnlessEqual(failed.status, 401)
+        self.failUnless(isinstance(failed.error, LinkedInApiJsonClientError))
+
+        self.failUnlessEqual(
+            metrics.histogram('/v1/people/~:(...)').count, 1)
+        text = metrics.to_prometheus()
+        self.failUnless(
+            'linkedin_api_request_duration_seconds_count{endpoint='
+            '"/v1/people/~:(...)",method="GET"} 1\n' in text)
+        self.failUnless(
+            'linkedin_api_requests_total{endpoint="/v1/people/~",'
+            'method="GET",status="401"} 1\n' in text)
+
+
+class TestNetworkUpdateSync(ApiTestCase):
+    def setUp(self):
+        super(TestNetworkUpdateSync, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        super(TestNetworkUpdateSync, self).tearDown()
+
+    def test_sync(self):
+        """
+        Tests that a sync only returns updates newer than the stored mark,
+        requests them with "after", and persists the advanced mark.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        updates = [
+            {'updateKey': 'a', 'timestamp': 1000},
+            {'updateKey': 'b', 'timestamp': 2000},
+            {'updateKey': 'c', 'timestamp': 2000},
+        ]
+        queries = []
+
+        def fake_request(uri, method, body='', headers=None):
+            query = dict(urlparse.parse_qsl(urlparse.urlparse(uri).query))
+            queries.append(query)
+            after = int(query.get('after', 0))
+            values = [u for u in updates if u['timestamp'] >= after]
+            return self._responseFactoryAPI(), simplejson.dumps({
+                '_total': len(values), 'values': values})
+
+        path = os.path.join(self.tmp_dir, 'marks.db')
+        syncer = sync.NetworkUpdateSync(
+            self.api, sync.SQLiteWatermarkStore(path))
+
+        with patch('linkedin_json_client.api.oauth.Client') as patched_Client:
+            client = patched_Client.return_value
+            client.request.side_effect = fake_request
+
+            self.failUnlessEqual(
+                syncer.sync('user', access_token), updates)
+            self.failIf('after' in queries[-1])
+            self.failUnlessEqual(syncer.sync('user', access_token), [])
+            self.failUnlessEqual(queries[-1]['after'], '2000')
+
+            updates.append({'updateKey': 'd', 'timestamp': 3000})
+            syncer = sync.NetworkUpdateSync(
+                self.api, sync.SQLiteWatermarkStore(path))
+            self.failUnlessEqual(
+                syncer.sync('user', access_token), updates[-1:])
+
+        self.failUnlessEqual(
+            sync.SQLiteWatermarkStore(path).get('user'),
+            (3000, frozenset(['d'])))
+
+
+    def test_timestamps_are_utc(self):
+        """
+        Tests that datetimes passed as "after" are sent as UTC milliseconds
+        whatever the timezone of the host.
+        """
+        tz = os.environ.get('TZ')
+        os.environ['TZ'] = 'America/New_York'
+        time.tzset()
+        try:
+            self.failUnlessEqual(
+                self.api.dt_obj_to_string(datetime(2012, 10, 31, 21)),
+                1351717200000)
+            query_args = {'after': datetime(2012, 10, 31, 21)}
+            self.api.prepare_network_update_args(query_args)
+            self.failUnlessEqual(query_args['after'], 1351717200000)
+            self.failUnlessEqual(
+                self.api.dt_obj_to_string(1351717200000), 1351717200000)
+        finally:
+            if tz is None:
+                del os.environ['TZ']
+            else:
+                os.environ['TZ'] = tz
+            time.tzset()
+
+
+class TestBulkSender(ApiTestCase):
+    def setUp(self):
+        super(TestBulkSender, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        super(TestBulkSender, self).tearDown()
+
+    def test_send_messages(self):
+        """
+        Tests that messages are sent in chunks, that a rejected recipient
+        is isolated from its chunk, and that a second run only retries the
+        recipients that failed.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        recipients = ['id%s' % i for i in range(23)] + ['bad']
+        report_path = os.path.join(self.tmp_dir, 'report.ndjson')
+        sent = []
+
+        def fake_request(uri, method, body='', headers=None):
+            if 'bad' in body:
+                return self._responseFactoryAPI({'status': '400'}), \
+                    simplejson.dumps({
+                        'errorCode': 0, 'status': 400, 'timestamp': 0,
+                        'message': 'Invalid recipient'})
+            sent.append(body.count('<recipient>'))
+            return self._responseFactoryAPI({'status': '201'}), ''
+
+        with self._patchedClient() as client:
+            client.request.side_effect = fake_request
+            sender = BulkSender(
+                self.api, access_token, max_workers=1,
+                report_path=report_path)
+            results = list(sender.send_messages(recipients, 'Hi', 'Hello'))
+
+            self.failUnlessEqual(len(results), len(recipients))
+            failed = [r.recipient for r in results if not r.ok]
+            self.failUnlessEqual(failed, ['bad'])
+            self.failUnlessEqual(sum(sent), 23)
+            self.failUnlessEqual(max(sent), 10)
+
+            sender = BulkSender(
+                self.api, access_token, report_path=report_path)
+            results = list(sender.send_messages(recipients, 'Hi', 'Hello'))
+            self.failUnlessEqual(
+                [(r.recipient, r.ok) for r in results], [('bad', False)])
+            self.failUnlessEqual(sum(sent), 23)
+
+    def test_report_error_text(self):
+        """
+        Tests that errors with non-ASCII messages, in bytes or in unicode,
+        are written to the report.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        report_path = os.path.join(self.tmp_dir, 'report.ndjson')
+        sender = BulkSender(self.api, access_token, report_path=report_path)
+        list(sender._report([
+            BulkResult('a', False, socket.error('R\xc3\xa9seau perdu')),
+            BulkResult('b', False, ValueError(u'R\xe9seau perdu'))]))
+        with open(report_path) as report:
+            self.failUnlessEqual(
+                [simplejson.loads(line)['error'] for line in report],
+                [u'R\xe9seau perdu'] * 2)
+
+
+class TestCassette(ApiTestCase):
+    def setUp(self):
+        super(TestCassette, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        super(TestCassette, self).tearDown()
+
+    def test_redaction(self):
+        """
+        Tests that tokens are redacted from the headers and query strings
+        of recorded requests and responses, whatever the order of keys.
+        """
+        path = os.path.join(self.tmp_dir, 'traffic.ndjson')
+        recorder = CassetteRecorder(path)
+        headers = [{'name': 'x-li-auth-token', 'value': 'name:secret1'},
+                   {'value': 'name:secret2', 'name': 'X-LI-AUTH-TOKEN'},
+                   {'name': 'accept', 'value': 'text/plain'}]
+        content = simplejson.dumps({'apiStandardProfileRequest': {
+            'headers': {'_total': 3, 'values': headers},
+            'url': 'http://api.linkedin.com/v1/people/x?oauth_token=secret3',
+        }, 'x-li-auth-token': 'name:secret4'})
+        recorder.record(
+            'GET', 'http://api.linkedin.com/v1/people/~', {
+                'x-li-auth-token': 'name:secret5', 'oauth_token': 'secret6',
+                'next': '/v1/people/~?oauth_token=secret7&start=10'},
+            '', self._responseFactoryAPI(), content, 0, 0.1)
+        recorder.close()
+
+        with open(path) as cassette_file:
+            recorded = cassette_file.read()
+        self.failIf('secret' in recorded)
+        entry = simplejson.loads(recorded)
+        self.failUnlessEqual(entry['query'], {
+            'x-li-auth-token': 'REDACTED',
+            'next': '/v1/people/~?oauth_token=REDACTED&start=10'})
+        request = simplejson.loads(entry['content'])[
+            'apiStandardProfileRequest']
+        self.failUnlessEqual(
+            [h['value'] for h in request['headers']['values']],
+            ['REDACTED', 'REDACTED', 'text/plain'])
+        self.failUnless(request['url'].endswith('oauth_token=REDACTED'))
+
+    def test_record_and_replay(self):
+        """
+        Tests that recorded traffic is redacted and replayed in-process and
+        through the fake server.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        path = os.path.join(self.tmp_dir, 'traffic.ndjson')
+        recorder = CassetteRecorder(path)
+        recording_api = api.LinkedInJsonAPI(
+            self.consumer_key, self.consumer_secret, recorder=recorder)
+        page = {'_total': 1, 'values': [{'id': 'abc'}]}
+
+        with patch('linkedin_json_client.api.oauth.Client') as patched_Client:
+            client = patched_Client.return_value
+            client.request.return_value = (
+                self._responseFactoryAPI(), simplejson.dumps(page))
+            recording_api.get_user_connections(
+                access_token, query_args={'count': 1})
+            client.request.return_value = (
+                self._responseFactory(), self.request_token)
+            recording_api.get_request_token()
+        recorder.close()
+
+        with open(path) as cassette_file:
+            recorded = cassette_file.read()
+        self.failUnlessEqual(2, recorded.count('\n'))
+        self.failIf('9f63bba2' in recorded or 'b437f289' in recorded)
+        self.failUnless('oauth_token=REDACTED' in recorded)
+
+        cassette = Cassette(path)
+        replay_api = replay_class(cassette, speed=1000)(
+            self.consumer_key, self.consumer_secret)
+        self.failUnlessEqual(replay_api.get_user_connections(
+            access_token, query_args={'count': 1}), page)
+        self.failUnlessEqual(
+            replay_api.get_request_token()['oauth_callback_confirmed'],
+            'true')
+        self.assertRaises(
+            LinkedInApiJsonClientError, replay_api.get_user_connections,
+            access_token, query_args={'count': 2})
+
+        with FakeLinkedInServer(cassette=cassette, speed=1000) as server:
+            server_api = client_class(server.base_url)(
+                self.consumer_key, self.consumer_secret)
+            results = list(cassette.replay(
+                server_api, access_token, speed=1000))
+            self.failUnlessEqual(len(results), 1)
+            self.failUnlessEqual(
+                simplejson.loads(results[0][1].result()), page)
+            server_api.pool.clear()
+
+
+class FakeServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeLinkedInServer(connections=120).start()
+        self.api = client_class(self.server.base_url)(
+            'fake-key', 'fake-secret')
+
+    def tearDown(self):
+        self.api.pool.clear()
+        self.server.stop()
+
+
+class TestFakeServer(FakeServerTestCase):
+    def test_end_to_end(self):
+        """
+        Tests the client against the fake server over real sockets.
+        """
+        access_token = loadtest.ACCESS_TOKEN
+        self.failUnlessEqual(
+            self.api.api_profile_url,
+            self.server.base_url + '/v1/people/~')
+        self.failUnlessEqual(
+            self.api.get_user_profile(access_token)['id'], 'Id00000000')
+        self.failUnlessEqual(
+            [p['id'] for p in self.api.iter_user_connections(
+                access_token, page_size=50)],
+            ['Id%08d' % i for i in range(120)])
+        self.failUnless(
+            self.api.get_request_token()['oauth_callback_confirmed'])
+
+        self.server.config['error_rate'] = 1.0
+        try:
+            self.api.get_user_profile(access_token)
+            self.fail('Expected a LinkedInApiJsonClientError')
+        except LinkedInApiJsonClientError as e:
+            self.failUnlessEqual(e.status, 503)
+
+
+class TestColumnar(FakeServerTestCase):
+    @unittest.skipIf(columnar._import('pyarrow') is None or
+                     columnar._import('numpy') is None,
+                     'pyarrow and numpy are required')
+    def test_export_columnar(self):
+        """
+        Tests that connections exported in every format read back with the
+        same values, and that dictionary columns are encoded.
+        """
+        import numpy
+        import pyarrow
+        import pyarrow.parquet
+
+        access_token = loadtest.ACCESS_TOKEN
+        projection = [
+            BasicProfileSelectors.ID, BasicProfileSelectors.INDUSTRY,
+            BasicProfileSelectors.LOCATION_NAME,
+            BasicProfileSelectors.HEADLINE]
+        people = list(self.api.iter_user_connections(
+            access_token, selectors=projection))
+
+        array, dictionaries = columnar.to_numpy(people, projection)
+        self.failUnlessEqual(
+            list(array['id']), ['Id%08d' % i for i in range(120)])
+        self.failUnlessEqual(
+            [dictionaries['industry'][code] for code in array['industry']],
+            [p['industry'] for p in people])
+        self.failUnless(len(dictionaries['industry']) < len(people))
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            for format in columnar.FORMATS:
+                path = os.path.join(tmp_dir, 'connections.' + format)
+                self.failUnlessEqual(columnar.export_connections(
+                    self.api, access_token, path, projection, format,
+                    page_size=50), 120)
+                if 'numpy' == format:
+                    data = numpy.load(path)
+                    locations = [
+                        data['dictionary:location.name'][code]
+                        for code in data['data']['location.name']]
+                    headlines = list(data['data']['headline'])
+                else:
+                    if 'parquet' == format:
+                        table = pyarrow.parquet.read_table(path)
+                    else:
+                        table = pyarrow.ipc.open_file(
+                            pyarrow.OSFile(path)).read_all()
+                    self.failUnlessEqual(table.num_rows, 120)
+                    locations = table.column('location.name').to_pylist()
+                    headlines = table.column('headline').to_pylist()
+                self.failUnlessEqual(
+                    locations, [p['location']['name'] for p in people], format)
+                self.failUnlessEqual(
+                    headlines, [p['headline'] for p in people], format)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+
+class TestHarvest(FakeServerTestCase):
+    def setUp(self):
+        super(TestHarvest, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        super(TestHarvest, self).tearDown()
+
+    def test_harvest(self):
+        """
+        Tests that a harvest writes every member to the shards once, with
+        all of their network updates, that a second run skips the
+        checkpointed members, and that members harvested again only get
+        the updates newer than their watermark.
+        """
+        self.server.config['updates'] = 600
+        token_path = os.path.join(self.tmp_dir, 'tokens.txt')
+        output_dir = os.path.join(self.tmp_dir, 'out')
+        with open(token_path, 'w') as tokens:
+            tokens.write('# members\n')
+            tokens.write(simplejson.dumps({
+                'id': 'member0', 'oauth_token': 't0',
+                'oauth_token_secret': 's0'}) + '\n')
+            for i in range(1, 4):
+                tokens.write(
+                    'oauth_token=t%s&oauth_token_secret=s%s\n' % (i, i))
+
+        counts = harvest.harvest(
+            token_path, output_dir, 'fake-key', 'fake-secret',
+            processes=2, shards=3, base_url=self.server.base_url)
+        self.failUnlessEqual(
+            counts, {'done': 4, 'failed': 0, 'skipped': 0})
+
+        def read_shards():
+            kinds = {}
+            members = set()
+            for name in os.listdir(output_dir):
+                if name.startswith('harvest-'):
+                    with open(os.path.join(output_dir, name)) as shard:
+                        for line in shard:
+                            record = simplejson.loads(line)
+                            kinds[record['kind']] = kinds.get(
+                                record['kind'], 0) + 1
+                            members.add(record['member'])
+            return kinds, members
+
+        kinds, members = read_shards()
+        self.failUnlessEqual(
+            kinds, {'profile': 4, 'connection': 4 * 120,
+                    'update': 4 * 600})
+        self.failUnless('member0' in members)
+        self.failIf('t1' in ''.join(members))
+
+        self.failUnlessEqual(harvest.harvest(
+            token_path, output_dir, 'fake-key', 'fake-secret',
+            processes=2, base_url=self.server.base_url),
+            {'done': 0, 'failed': 0, 'skipped': 4})
+
+        os.remove(os.path.join(output_dir, harvest.CHECKPOINT))
+        self.failUnlessEqual(harvest.harvest(
+            token_path, output_dir, 'fake-key', 'fake-secret',
+            processes=2, shards=3, base_url=self.server.base_url),
+            {'done': 4, 'failed': 0, 'skipped': 0})
+        self.failUnlessEqual(read_shards()[0], {
+            'profile': 8, 'connection': 8 * 120, 'update': 4 * 600})
+
+    def test_harvest_bad_tokens(self):
+        """
+        Tests that malformed lines of the token file are reported without
+        stopping the harvest, and that numeric ids are used as members.
+        """
+        self.failUnlessEqual(harvest.parse_token(
+            '{"id": 42, "oauth_token": "t", "oauth_token_secret": "s"}\n'),
+            ('42', {'id': 42, 'oauth_token': 't',
+                    'oauth_token_secret': 's'}))
+        for line in ('foo=bar', '{"oauth_token": "t"', '[1]',
+                     '{"oauth_token": 1, "oauth_token_secret": "s"}'):
+            self.failUnlessRaises(ValueError, harvest.parse_token, line)
+
+        token_path = os.path.join(self.tmp_dir, 'tokens.txt')
+        output_dir = os.path.join(self.tmp_dir, 'out')
+        with open(token_path, 'w') as tokens:
+            tokens.write('foo=bar\n')
+            tokens.write(simplejson.dumps({
+                'id': 42, 'oauth_token': 't0',
+                'oauth_token_secret': 's0'}) + '\n')
+            tokens.write('oauth_token=t1&oauth_token_secret=s1\n')
+
+        self.failUnlessEqual(harvest.harvest(
+            token_path, output_dir, 'fake-key', 'fake-secret',
+            processes=2, kinds=('profile',),
+            base_url=self.server.base_url),
+            {'done': 2, 'failed': 1, 'skipped': 0})
+        with open(os.path.join(output_dir, harvest.CHECKPOINT)) as f:
+            self.failUnless('42\n' in f.readlines())
+        with open(os.path.join(output_dir, harvest.ERRORS)) as f:
+            self.failUnlessEqual(
+                [simplejson.loads(line) for line in f],
+                [{'line': 1, 'error': 'ValueError: no oauth_token'}])
+
+
+class TestLoadTest(FakeServerTestCase):
+    def test_loadtest(self):
+        """
+        Tests that the load test reports every method without errors.
+        """
+        results = loadtest.run(self.api, requests=4, concurrency=2)
+        self.failUnlessEqual(sorted(results), sorted(loadtest.METHODS))
+        for name, result in results.items():
+            self.failUnlessEqual(result['errors'], 0, name)
+            self.failUnless(result['p50'] <= result['p99'])
+
+
+class TestAsyncApi(ApiTestCase):
+    def setUp(self):
+        super(TestAsyncApi, self).setUp()
+        self.async_api = async_api.AsyncLinkedInJsonAPI(
+            self.consumer_key, self.consumer_secret, max_workers=4)
+
+    def tearDown(self):
+        self.async_api.close()
+        super(TestAsyncApi, self).tearDown()
+
+    def test_blocking_helpers(self):
+        """
+        Tests that the helpers of the blocking client work on the async
+        client, and that helpers taking a client accept it.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        people = [{'id': 'Id%d' % i, 'updateKey': 'Key%d' % i, 'timestamp': i}
+                  for i in range(5)]
+
+        def fake_request(uri, method, body='', headers=None):
+            query = dict(urlparse.parse_qsl(urlparse.urlparse(uri).query))
+            start = int(query.get('start', 0))
+            count = int(query.get('count', len(people)))
+            values = people[start:start + count]
+            return self._responseFactoryAPI(), simplejson.dumps({
+                '_total': len(people), 'values': values})
+
+        with self._patchedClient() as client:
+            client.request.side_effect = fake_request
+            self.failUnlessEqual(
+                list(self.async_api.iter_user_connections(
+                    access_token, page_size=2)),
+                people)
+            results = list(self.async_api.get_user_profiles_many(
+                [access_token], max_workers=1))
+            self.failUnlessEqual(
+                results, [(access_token, {
+                    '_total': len(people), 'values': people}, None)])
+            syncer = sync.NetworkUpdateSync(self.async_api)
+            self.failUnlessEqual(
+                len(syncer.sync('user', access_token)), len(people))
+
+    def test_coalesce(self):
+        """
+        Tests that concurrent identical GETs share one network call, and
+        that its result is returned to every caller, but that GETs with
+        different arguments or headers do not.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        data = {'firstName': 'John'}
+        coalescing_api = async_api.AsyncLinkedInJsonAPI(
+            self.consumer_key, self.consumer_secret, max_workers=8,
+            coalesce=True)
+        release = threading.Event()
+
+        def fake_request(uri, method, body='', headers=None):
+            release.wait(5)
+            return self._responseFactoryAPI(), simplejson.dumps(data)
+
+        with self._patchedClient() as client:
+            client.request.side_effect = fake_request
+            futures = [coalescing_api.get_user_profile(access_token)
+                       for i in range(8)]
+            deadline = time.time() + 5
+            while (coalescing_api.coalescer.stats()['coalesced'] < 7 and
+                   time.time() < deadline):
+                time.sleep(0.001)
+            release.set()
+            for future in futures:
+                self.failUnlessEqual(future.result(), data)
+        coalescing_api.close()
+
+        self.failUnlessEqual(client.request.call_count, 1)
+        self.failUnlessEqual(
+            coalescing_api.coalescer.stats(),
+            {'executed': 1, 'coalesced': 7, 'in_flight': 0})
+
+        # GETs with different headers, such as the language of the
+        # response, are not merged
+        coalescing_api = async_api.AsyncLinkedInJsonAPI(
+            self.consumer_key, self.consumer_secret, max_workers=2,
+            coalesce=True)
+        release.clear()
+        with self._patchedClient() as client:
+            client.request.side_effect = fake_request
+            futures = [coalescing_api.get_user_profile(
+                access_token, headers={'Accept-Language': language})
+                for language in ('en-US', 'fr-FR')]
+            deadline = time.time() + 5
+            while client.request.call_count < 2 and time.time() < deadline:
+                time.sleep(0.001)
+            release.set()
+            for future in futures:
+                self.failUnlessEqual(future.result(), data)
+        coalescing_api.close()
+        self.failUnlessEqual(
+            coalescing_api.coalescer.stats(),
+            {'executed': 2, 'coalesced': 0, 'in_flight': 0})
+
+        # list arguments, such as update types, are part of the key
+        coalescing_api = api.LinkedInJsonAPI(
+            self.consumer_key, self.consumer_secret, coalesce=True)
+        with self._patchedClient() as client:
+            client.request.return_value = (
+                self._responseFactoryAPI(), simplejson.dumps({'values': []}))
+            self.failUnlessEqual(coalescing_api.get_network_updates(
+                access_token, type=['CONN', 'STAT']), '{"values": []}')
+        self.failUnlessEqual(
+            coalescing_api.coalescer.stats()['executed'], 1)
+
+    def test_get_user_profile_future(self):
+        """
+        Tests that the async client returns futures resolving to the same
+        values and errors as the blocking client.
+        """
+        access_token = dict(urlparse.parse_qsl(self.access_token))
+        data = {'firstName': 'John', 'lastName': 'Smith'}
+
+        with self._patchedClient() as client:
+            client.request.return_value = (
+                self._responseFactoryAPI({'content-length': '41'}),
+                simplejson.dumps(data))
+            futures = [self.async_api.get_user_profile(access_token)
+                       for i in range(8)]
+            for future in futures:
+                self.failUnlessEqual(future.result(), data)
+
+            client.request.return_value = (
+                self._responseFactoryAPI({'status': '401'}),
+                'oauth_problem=token_rejected')
+            future = self.async_api.get_user_profile(access_token)
+            self.assertRaises(
+                LinkedInApiJsonClientError, future.result)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
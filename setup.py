@@ -9,6 +9,7 @@ os.system('cp %s/README.md %s/README.txt' % (ROOT_DIR, ROOT_DIR))
 sdict = dict(
     name = 'linkedin-api-json-client',
     packages = ['linkedin_json_client'],
+    scripts = ['bin/linkedin-harvest'],
     version='.'.join(map(str, __import__('linkedin_json_client').__version__)),
     description = 'Python API for interacting with LinkedIn API.',
     long_description=open('README.md').read(),
@@ -20,6 +21,7 @@ sdict = dict(
     keywords = ['linkedin', 'api'],
     license = 'MIT',
     install_requires=[
+        'futures',
         'mock',
         'oauth2',
         'simplejson'